@@ -8,10 +8,60 @@ class Settings:
     NEO4J_USER = os.getenv("NEO4J_USER")
     NEO4J_PASS = os.getenv("NEO4J_PASS")
     NEO4J_DATABASE = os.getenv("NEO4J_DATABASE")
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "neo4j")  # neo4j | memory
+    NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+    NEO4J_ACQUIRE_TIMEOUT_S = float(os.getenv("NEO4J_ACQUIRE_TIMEOUT_S", "10"))
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
     TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
     GEOCODE_USER_AGENT = os.getenv("GEOCODE_USER_AGENT")
+    GEOCODER_BACKEND = os.getenv("GEOCODER_BACKEND", "online")  # online | offline | offline+online
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")  # CSV: name, city, postcode, lat, lon
+    GEOCODE_CACHE_PATH = os.getenv(
+        "GEOCODE_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), "services", "cache", "geocode.sqlite")
+    )
+    GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+    GEOCODE_CACHE_TTL_S = float(os.getenv("GEOCODE_CACHE_TTL_S", str(30 * 86400)))
+    GEOCODE_NEGATIVE_TTL_S = float(os.getenv("GEOCODE_NEGATIVE_TTL_S", "86400"))
+    GEOCODE_RATE_PER_S = float(os.getenv("GEOCODE_RATE_PER_S", "1"))  # Nominatim policy
+    GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "2"))
+    GEOCODE_MAX_ATTEMPTS = int(os.getenv("GEOCODE_MAX_ATTEMPTS", "5"))  # per address, on provider errors
+    GEOCODE_RETRY_BACKOFF_S = float(os.getenv("GEOCODE_RETRY_BACKOFF_S", "30"))  # doubles per attempt
+    GEOCODE_SWEEP_S = float(os.getenv("GEOCODE_SWEEP_S", "600"))  # how often unresolved orders are re-submitted
+    GEOCODE_SWEEP_AGE_S = float(os.getenv("GEOCODE_SWEEP_AGE_S", "900"))  # only orders older than the retry window
+    NOTIFY_TRANSPORT = os.getenv("NOTIFY_TRANSPORT", "twilio")  # twilio | fake
+    NOTIFY_OUTBOX_PATH = os.getenv(
+        "NOTIFY_OUTBOX_PATH",
+        os.path.join(os.path.dirname(__file__), "services", "cache", "outbox.sqlite")
+    )
+    NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+    NOTIFY_BACKOFF_S = float(os.getenv("NOTIFY_BACKOFF_S", "2"))  # doubles per attempt
+    NOTIFY_COALESCE_S = float(os.getenv("NOTIFY_COALESCE_S", "30"))  # merge messages to one phone within this window
+    NOTIFY_LEASE_S = float(os.getenv("NOTIFY_LEASE_S", "300"))  # a claimed send older than this is presumed dead
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))  # orders per UNWIND write
+    IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "50000"))
+    ANALYTICS_RECONCILE_S = float(os.getenv("ANALYTICS_RECONCILE_S", "300"))
+    ANALYTICS_MAX_HOURS = int(os.getenv("ANALYTICS_MAX_HOURS", "168"))  # orders-per-hour history kept
+    ROUTE_CACHE_TTL_S = float(os.getenv("ROUTE_CACHE_TTL_S", "60"))  # then re-synced from the repository
+    CUSTOMER_ORDERS_CACHE_TTL_S = float(os.getenv("CUSTOMER_ORDERS_CACHE_TTL_S", "30"))
+    MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), "services", "models"))
+    MODEL_RELOAD_S = float(os.getenv("MODEL_RELOAD_S", "10"))  # how often workers check for a new version
+    MODEL_KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "5"))
+    ETA_TRAIN_BATCH_SIZE = int(os.getenv("ETA_TRAIN_BATCH_SIZE", "32"))
+    ETA_TRAIN_FLUSH_S = float(os.getenv("ETA_TRAIN_FLUSH_S", "60"))
+    ETA_TRAIN_MIN_SAMPLES = int(os.getenv("ETA_TRAIN_MIN_SAMPLES", "50"))
+    ROUTE_TIME_LIMIT_S = float(os.getenv("ROUTE_TIME_LIMIT_S", "10"))
+    ROUTE_REOPTIMIZE_EVERY = int(os.getenv("ROUTE_REOPTIMIZE_EVERY", "25"))
+    ROUTE_REOPTIMIZE_TIME_LIMIT_S = float(os.getenv("ROUTE_REOPTIMIZE_TIME_LIMIT_S", "1"))
+    AGENT_INDEX_REFRESH_S = float(os.getenv("AGENT_INDEX_REFRESH_S", "300"))
+    ASSIGN_MAX_KM = float(os.getenv("ASSIGN_MAX_KM", "0")) or None  # 0 = no cutoff
+    ASSIGN_TIME_LIMIT_S = float(os.getenv("ASSIGN_TIME_LIMIT_S", "5"))  # batch assignment solve budget
+    ASSIGN_CANDIDATES = int(os.getenv("ASSIGN_CANDIDATES", "10"))  # nearest agents considered per order
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "")  # unset = request profiling disabled
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # share of requests profiled; X-Profile: 1 forces
+    PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_S", "0.005"))
 
 settings = Settings()
@@ -1,26 +1,58 @@
 # main.py - FastAPI entry point
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from fastapi import FastAPI
+from backend.config import settings
 from backend.routes.orders import router as orders_router
 from backend.routes.agents import router as agents_router
 from backend.routes.orchestrator import router as orchestrator_router
+from backend.routes.analytics import router as analytics_router
+from backend.routes.routes import router as routes_router
+from backend.services.repository import get_repository
+from backend.utils import metrics
+from backend.utils.logger import logger
 
-app = FastAPI()
-app.include_router(orders_router)
-app.include_router(agents_router)
-app.include_router(orchestrator_router)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Services are created on first use; startup only bootstraps the schema
+    # and resumes sending any notifications left in the outbox; analytics
+    # counters are rebuilt and orders stuck in geocoding re-submitted in the
+    # background, then periodically
+    if settings.STORAGE_BACKEND == "neo4j":
+        from backend.services.schema import apply_schema
+        try:
+            await apply_schema(get_repository())
+        except Exception as e:
+            logger.error(f"Schema bootstrap failed: {e}")
+    from backend.services.notification_dispatcher import notification_dispatcher
+    await notification_dispatcher.start()
+    from backend.services.analytics import analytics
+    from backend.services.order_import import run_geocode_sweeper
+    background = [
+        asyncio.create_task(analytics.run_reconciler(get_repository())),
+        asyncio.create_task(run_geocode_sweeper(get_repository())),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    from backend.services.geocode_worker import geocode_worker
+    await geocode_worker.stop()
+    await notification_dispatcher.stop()
+    await get_repository().close()
 
-# import routers here
-from fastapi import FastAPI
-from backend.routes.orders import router as orders_router
-from backend.routes.orchestrator import router as orchestrator_router
 
-app = FastAPI(title="Badminton Agent Pro")
+app = FastAPI(title="Badminton Agent Pro", lifespan=lifespan)
+metrics.install(app)
 
 app.include_router(orders_router)
+app.include_router(agents_router)
 app.include_router(orchestrator_router)
+app.include_router(analytics_router)
+app.include_router(routes_router)
 
 @app.get("/")
 def root():
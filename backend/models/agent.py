@@ -1,8 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional
 
+DEFAULT_CAPACITY = 20  # rackets per day
+
 class Agent(BaseModel):
     agent_id: str
     name: str
     lat: Optional[float] = None
     lon: Optional[float] = None
+    status: str = "active"
+    capacity: int = DEFAULT_CAPACITY
@@ -9,3 +9,7 @@ class Order(BaseModel):
     lon: Optional[float] = None
     assigned_agent: Optional[str] = None
     status: str = "pending"
+    rackets: int = 1
+    window_start: Optional[int] = None  # minutes after midnight
+    window_end: Optional[int] = None
+    service_minutes: int = 20  # per racket
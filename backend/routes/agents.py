@@ -1,17 +1,19 @@
 from fastapi import APIRouter, HTTPException
 from backend.models.agent import Agent
-from backend.services.neo4j_client import neo4j_client
+from backend.services.repository import get_repository
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 @router.post("/create")
 async def create_agent(agent: Agent):
-    neo4j_client.create_agent(agent.agent_id, agent.name, agent.lat, agent.lon)
+    await get_repository().create_agent(
+        agent.agent_id, agent.name, agent.status, agent.lat, agent.lon, agent.capacity
+    )
     return {"message": "Agent created successfully", "agent": agent.dict()}
 
 @router.get("/{agent_id}")
 async def get_agent(agent_id: str):
-    agent = neo4j_client.get_agent(agent_id)
+    agent = await get_repository().get_agent(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
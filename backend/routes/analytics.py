@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from backend.services.analytics import analytics
+from backend.services.repository import get_repository
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("")
+async def get_analytics():
+    # Served from in-memory counters; no database work per request
+    return analytics.snapshot()
+
+@router.post("/reconcile")
+async def reconcile_analytics():
+    await analytics.reconcile(get_repository())
+    return analytics.snapshot()
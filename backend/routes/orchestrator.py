@@ -1,29 +1,81 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from fastapi import Body
-from backend.services.llm_agent import llm_client
-from backend.services.neo4j_client import neo4j_client
+from backend.services.repository import get_repository
+from backend.services.dispatcher import match_orders_to_agents
+from backend.services.route_planner import route_planner
+from backend.services.analytics import analytics
+from backend.config import settings
+from backend.utils.ids import order_id_forms
 
 router = APIRouter(prefix="/orchestrator", tags=["orchestrator"])
 
 @router.post("/assign_agent/{order_id}")
 async def assign_agent(order_id: str):
-    # Fetch order details
-    order = neo4j_client.get_order(order_id)
-    if not order:
+    # Fetch order details; API orders have integer ids, registration page ones strings
+    for order_id in order_id_forms(order_id):
+        order = await get_repository().get_order(order_id)
+        if order:
+            break
+    else:
         raise HTTPException(status_code=404, detail="Order not found")
     
     # Decide agent assignment via AI
+    from backend.services.llm_agent import llm_client
     agent_id = llm_client.assign_agent(order)
-    neo4j_client.assign_order_to_agent(order_id, agent_id)
+    await get_repository().assign_order_to_agent(order_id, agent_id)
+    analytics.order_assigned(order["order_id"], agent_id)
+    from backend.services.route_geometry import route_cache
+    route_cache.invalidate(agent_id)
     
     return {"message": f"Order {order_id} assigned to agent {agent_id}"}
 
 
+@router.post("/assign_batch")
+async def assign_batch():
+    # Load the whole backlog and the fleet once
+    orders, agents = await asyncio.gather(
+        get_repository().get_pending_orders(),
+        get_repository().get_active_agents_with_load(),
+    )
+    if not orders:
+        return {"assigned": [], "unassigned": []}
+    if not agents:
+        raise HTTPException(status_code=409, detail="No active agents available")
+
+    # The CP-SAT solve and the route re-optimizations run off the event loop
+    assignments, unassigned = await asyncio.to_thread(
+        match_orders_to_agents, orders, agents, max_km=settings.ASSIGN_MAX_KM
+    )
+    if assignments:
+        await get_repository().assign_orders_bulk(
+            [{"order_id": a["order_id"], "agent_id": a["agent_id"]} for a in assignments]
+        )
+
+    agents_by_id = {a["agent_id"]: a for a in agents}
+    orders_by_id = {o["order_id"]: o for o in orders}
+    await asyncio.to_thread(_plan_routes, assignments, agents_by_id, orders_by_id)
+    for a in assignments:
+        analytics.order_assigned(a["order_id"], a["agent_id"], agents_by_id[a["agent_id"]].get("name"))
+
+    return {"assigned": assignments, "unassigned": unassigned}
+
+
+def _plan_routes(assignments, agents_by_id, orders_by_id):
+    for a in assignments:
+        agent = agents_by_id[a["agent_id"]]
+        order = orders_by_id[a["order_id"]]
+        if not route_planner.has_agent(agent["agent_id"]):
+            route_planner.set_agent(agent["agent_id"], agent["lat"], agent["lon"])
+        route_planner.insert_order(agent["agent_id"], order["order_id"], order["lat"], order["lon"])
+
+
 @router.post("/chat")
 async def chat_with_ai(payload: dict = Body(...)):
     user_message = payload.get("message")
     if not user_message:
         raise HTTPException(status_code=400, detail="Message is required")
     
+    from backend.services.llm_agent import llm_client
     response = llm_client.chat(user_message)
     return {"response": response}
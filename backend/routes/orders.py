@@ -1,8 +1,17 @@
 # backend/routes/orders.py
-from fastapi import APIRouter, HTTPException
+import base64
+import json
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Literal
 from pydantic import BaseModel
-from backend.services.neo4j_client import neo4j_client
-from backend.services.geocode_client import geocode_address  # Free geocoding
+from backend.services.repository import get_repository
+from backend.services.geocode_worker import geocode_worker  # Rate-limited, cached geocoding
+from backend.services.geocode_client import local_geocode
+from backend.services.geocode_cache import MISSING
+from backend.services.read_cache import customer_orders_cache
+from backend.services.analytics import analytics
+from backend.utils.ids import new_order_id, order_id_forms
 from datetime import datetime
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -14,60 +23,78 @@ class OrderCreate(BaseModel):
     issue: str | None = None
     address: str
 
+class StatusUpdate(BaseModel):
+    status: Literal["pending", "in_progress", "completed"]
+
+class EtaFeatures(BaseModel):
+    distance_km: float
+    traffic_level: float = 1.0
+    agent_score: float = 1.0
+
+class EtaRequest(BaseModel):
+    rows: list[EtaFeatures]
+
+# ----- Cursors -----
+def encode_cursor(record):
+    """
+    Opaque page cursor for the last record of a page: its (timestamp, order_id).
+    Undated orders are keyed on "", the same as the repositories sort them.
+    """
+    raw = json.dumps([record.get("timestamp") or "", record["order_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        timestamp, order_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return timestamp or "", order_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 # ----- Routes -----
 @router.post("/create")
 async def create_order(order: OrderCreate):
-    try:
-        # Geocode address
-        lat, lon, city = geocode_address(order.address)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Geocoding failed: {e}")
-
-    order_id = int(datetime.now().timestamp())
+    # Cached addresses are resolved inline; anything else is accepted
+    # immediately and filled in once the geocoding queue gets to it
+    local = local_geocode(order.address)
+    if local is MISSING:
+        lat, lon, city = None, None, None
+        status = "geocoding"
+    else:
+        lat, lon, city = local
+        status = "pending" if lat is not None else "geocode_failed"
+    order_id = new_order_id()
     timestamp = datetime.now().isoformat()
 
-    with neo4j_client.driver.session() as session:
-        # Merge Customer node
-        session.run(
-            "MERGE (c:Customer {name:$customer})",
-            customer=order.customer_name
-        )
+    # Customer, Order and their relationships in a single transaction
+    await get_repository().create_customer_order({
+        "order_id": order_id,
+        "customer": order.customer_name,
+        "issue": order.issue or "N/A",
+        "status": status,
+        "address": order.address,
+        "lat": lat,
+        "lon": lon,
+        "city": city,
+        "timestamp": timestamp,
+        "racket_id": order.racket_id,
+    })
 
-        # Merge Order node
-        session.run(
-            "MERGE (o:Order {order_id:$order_id}) "
-            "SET o.issue=$issue, o.status='pending', o.address=$address, "
-            "o.lat=$lat, o.lon=$lon, o.city=$city, o.timestamp=$ts",
-            order_id=order_id,
-            issue=order.issue or "N/A",
-            address=order.address,
-            lat=lat,
-            lon=lon,
-            city=city,
-            ts=timestamp
-        )
+    customer_orders_cache.invalidate(order.customer_name)
+    analytics.order_created(order_id, status, city, timestamp)
 
-        # Link Customer → Order
-        session.run(
-            "MATCH (c:Customer {name:$customer}), (o:Order {order_id:$order_id}) "
-            "MERGE (c)-[:PLACED]->(o)",
-            customer=order.customer_name,
-            order_id=order_id
-        )
+    async def enrich(lat, lon, city):
+        status = "pending" if lat is not None else "geocode_failed"
+        await get_repository().set_order_location(order_id, lat, lon, city, status)
+        customer_orders_cache.invalidate(order.customer_name)
+        analytics.order_located(order_id, city, status)
 
-        # If racket_id is provided, link Order → Racket
-        if order.racket_id:
-            session.run(
-                "MATCH (o:Order {order_id:$order_id}), (r:Racket {racket_id:$racket_id}) "
-                "MERGE (o)-[:RELATES_TO]->(r)",
-                order_id=order_id,
-                racket_id=order.racket_id
-            )
+    if status == "geocoding":
+        geocode_worker.submit(order.address, enrich)
 
     return {
         "order_id": order_id,
         "customer": order.customer_name,
-        "status": "pending",
+        "status": status,
         "address": order.address,
         "city": city,
         "lat": lat,
@@ -75,18 +102,124 @@ async def create_order(order: OrderCreate):
         "timestamp": timestamp
     }
 
-@router.get("/customer/{customer_name}")
-async def get_customer_orders(customer_name: str):
-    with neo4j_client.driver.session() as session:
-        result = session.run(
-            "MATCH (c:Customer {name:$customer})-[:PLACED]->(o:Order) "
-            "OPTIONAL MATCH (o)-[:RELATES_TO]->(r:Racket) "
-            "RETURN o.order_id AS order_id, o.status AS status, "
-            "o.issue AS issue, o.address AS address, o.city AS city, "
-            "o.timestamp AS timestamp, r.brand AS racket_brand, r.type AS racket_type",
-            customer=customer_name
+@router.post("/import")
+async def import_orders(
+    request: Request,
+    format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+    chunk_size: int | None = Query(None, ge=1, le=10000),
+    wait_geocode: bool = False,
+):
+    """
+    Bulk-create orders from a CSV (header row) or NDJSON request body with
+    OrderCreate's fields. The body is parsed as it streams in. Returns
+    counts plus one entry per row: its order_id and status, or an error.
+    """
+    from backend.services import order_import
+
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+    lines = order_import.iter_lines(request.stream())
+    rows = order_import.parse_csv(lines) if format == "csv" else order_import.parse_ndjson(lines)
+    try:
+        return await order_import.import_orders(
+            get_repository(), rows, OrderCreate, chunk_size=chunk_size, wait_geocode=wait_geocode
         )
-        data = result.data()
-        if not data:
+    except order_import.ImportTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Upload must be UTF-8")
+
+@router.get("/recent")
+async def recent_orders(limit: int = Query(50, ge=1, le=500)):
+    return await get_repository().recent_orders(limit)
+
+@router.post("/{order_id}/status")
+async def update_order_status(order_id: str, update: StatusUpdate):
+    timestamp = datetime.now().isoformat()
+    for order_id in order_id_forms(order_id):
+        record = await get_repository().update_order_status(order_id, update.status, timestamp)
+        if record is not None:
+            break
+    else:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    customer_orders_cache.invalidate(record["customer"])
+    analytics.order_status_changed(order_id, update.status, timestamp)
+    if update.status == "completed":
+        from backend.services.route_planner import route_planner
+        from backend.services.eta_trainer import eta_trainer
+        route_planner.remove_order(order_id)
+        eta_trainer.record_completion(record)
+    return {"order_id": order_id, "status": update.status, "updated_at": timestamp}
+
+@router.get("/customer/{customer_name}")
+async def get_customer_orders(
+    customer_name: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Newest orders first, one page at a time; the X-Next-Cursor header
+    fetches the next page. format=ndjson streams every order after the
+    cursor, one JSON object per line, without paging or caching.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    repository = get_repository()
+
+    if format == "ndjson":
+        records = repository.stream_customer_orders(customer_name, after=after)
+        first = await anext(records, None)
+        if first is None:
             raise HTTPException(status_code=404, detail="No orders found")
-        return data
+
+        async def lines():
+            yield json.dumps(first) + "\n"
+            async for record in records:
+                yield json.dumps(record) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    key = (cursor, limit)
+    page = customer_orders_cache.get(customer_name, key)
+    if page is None:
+        # One extra row tells us whether another page exists
+        data = await repository.get_customer_orders(customer_name, limit=limit + 1, after=after)
+        next_cursor = encode_cursor(data[limit - 1]) if len(data) > limit else None
+        page = (data[:limit], next_cursor)
+        customer_orders_cache.set(customer_name, key, page)
+    data, next_cursor = page
+    if not data:
+        raise HTTPException(status_code=404, detail="No orders found")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return data
+
+
+@router.post("/eta")
+async def predict_etas(request: EtaRequest):
+    # One model call for every row, e.g. all stops of a route
+    from backend.services.ml_predictor import get_ml_predictor
+    rows = [row.model_dump() for row in request.rows]
+    try:
+        etas = get_ml_predictor().predict_route(rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"eta_minutes": etas}
+
+
+@router.post("/eta/reload")
+async def reload_eta_model():
+    """Serve the registry's current ETA model version now instead of at the next check."""
+    from backend.services.ml_predictor import get_ml_predictor
+    predictor = get_ml_predictor()
+    version = predictor.reload()
+    return {"version": version, "metadata": predictor.registry.metadata(version)}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException
+from backend.services.repository import get_repository
+
+router = APIRouter(prefix="/routes", tags=["routes"])
+
+@router.get("")
+async def get_routes():
+    # Imported on first use: pulls in the route planner and optimizer
+    from backend.services.route_geometry import get_all_routes
+    return await get_all_routes(get_repository())
+
+@router.get("/{agent_id}")
+async def get_agent_route(agent_id: str):
+    from backend.services.route_geometry import get_agent_route
+    route = await get_agent_route(get_repository(), agent_id)
+    if route is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return route
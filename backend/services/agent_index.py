@@ -0,0 +1,126 @@
+# backend/services/agent_index.py
+
+import math
+import threading
+import time
+import numpy as np
+from backend.services.distance_matrix import haversine_km
+
+KM_PER_DEG_LAT = 111.32
+MAX_RINGS = 64
+
+
+class AgentIndex:
+    """
+    In-process grid index over active agent positions.
+    Agents are bucketed into cells of `cell_deg` degrees; k-nearest queries
+    search rings of cells outward and stop once no unsearched cell can hold
+    a closer agent.
+    """
+
+    def __init__(self, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        self._cells = {}  # (row, col) -> set of agent_ids
+        self._agents = {}  # agent_id -> (lat, lon, cell, name)
+        self._lock = threading.RLock()
+        self.loaded_at = None
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def load(self, agents):
+        """Replace the index contents. agents: dicts with agent_id, name, lat, lon."""
+        with self._lock:
+            self._cells.clear()
+            self._agents.clear()
+            for agent in agents:
+                self.upsert(agent["agent_id"], agent["lat"], agent["lon"], name=agent.get("name"))
+            self.loaded_at = time.monotonic()
+
+    def is_stale(self, max_age_s):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > max_age_s
+
+    def upsert(self, agent_id, lat, lon, status="active", name=None):
+        """Add, move or (for non-active status) remove an agent."""
+        with self._lock:
+            self.remove(agent_id)
+            if status != "active" or lat is None or lon is None:
+                return
+            cell = self._cell(lat, lon)
+            self._cells.setdefault(cell, set()).add(agent_id)
+            self._agents[agent_id] = (lat, lon, cell, name)
+
+    def remove(self, agent_id):
+        with self._lock:
+            entry = self._agents.pop(agent_id, None)
+            if entry:
+                bucket = self._cells.get(entry[2])
+                bucket.discard(agent_id)
+                if not bucket:
+                    del self._cells[entry[2]]
+
+    def __len__(self):
+        return len(self._agents)
+
+    def _ring(self, center, radius):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for dc in range(-radius, radius + 1):
+            yield row - radius, col + dc
+            yield row + radius, col + dc
+        for dr in range(-radius + 1, radius):
+            yield row + dr, col - radius
+            yield row + dr, col + radius
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """
+        k nearest active agents to (lat, lon), optionally within max_km.
+        returns: list of dicts with agent_id, name, lat, lon, distance_km, nearest first
+        """
+        with self._lock:
+            if not self._agents:
+                return []
+            center = self._cell(lat, lon)
+            candidates = []
+            found = []
+            radius = 0
+            while True:
+                if radius > MAX_RINGS:
+                    # Far from every agent: a flat scan is cheaper than more rings
+                    candidates = list(self._agents)
+                else:
+                    for cell in self._ring(center, radius):
+                        candidates.extend(self._cells.get(cell, ()))
+                if candidates:
+                    points = np.array([self._agents[a][:2] for a in candidates])
+                    dist = haversine_km(lat, lon, points[:, 0], points[:, 1])
+                    order = np.argsort(dist)[:k]
+                    found = [(candidates[i], float(dist[i])) for i in order]
+                # Anything outside ring `radius` is at least `radius` cell widths away;
+                # use the narrowest (highest-latitude) longitude width in the band
+                band_lat = min(abs(lat) + (radius + 1) * self.cell_deg, 89.0)
+                bound = radius * self.cell_deg * KM_PER_DEG_LAT * math.cos(math.radians(band_lat))
+                if max_km is not None and bound > max_km:
+                    break
+                if len(found) >= k and found[-1][1] <= bound:
+                    break
+                if len(candidates) == len(self._agents):
+                    break
+                radius += 1
+
+            return [
+                {
+                    "agent_id": agent_id,
+                    "name": self._agents[agent_id][3],
+                    "lat": self._agents[agent_id][0],
+                    "lon": self._agents[agent_id][1],
+                    "distance_km": dist,
+                }
+                for agent_id, dist in found
+                if max_km is None or dist <= max_km
+            ]
+
+
+agent_index = AgentIndex()
@@ -0,0 +1,214 @@
+# backend/services/analytics.py
+# Pre-aggregated dashboard numbers, kept current by order events instead of
+# graph-wide aggregates on every read. Each API worker keeps its own copy;
+# a periodic reconciliation against the repository corrects any drift
+# (events handled by other workers, writes from the Streamlit process).
+
+import asyncio
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime
+from backend.config import settings
+from backend.utils.logger import logger
+
+# Completion latency histogram bucket upper bounds, in minutes
+LATENCY_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480, 720, 1440, 2880, 10080)
+
+
+def _minutes_between(start, end):
+    try:
+        minutes = (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds() / 60
+    except (TypeError, ValueError):
+        return None
+    return minutes if minutes >= 0 else None
+
+
+def _hour(timestamp):
+    return timestamp[:13] if timestamp else None  # "YYYY-MM-DDTHH"
+
+
+class LatencyHistogram:
+    """Fixed buckets: constant-time inserts and percentiles however many orders complete."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, minutes):
+        self.counts[bisect.bisect_left(self.bounds, minutes)] += 1
+        self.total += 1
+        self.sum += minutes
+
+    def percentile(self, q):
+        """Linear interpolation within the bucket holding the q-th quantile."""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return float(self.bounds[-1])
+
+
+class AnalyticsStore:
+    def __init__(self, max_hours=None):
+        self.max_hours = max_hours or settings.ANALYTICS_MAX_HOURS
+        self._lock = threading.Lock()
+        self._reset()
+        self._replay = None  # events seen while a reconciliation reads, applied again after it
+        self.reconciled_at = None
+
+    def _reset(self):
+        self.orders = {}  # order_id -> {status, city, hour, timestamp, agent_id}
+        self.agent_names = {}
+        self.by_status = Counter()
+        self.by_city = Counter()
+        self.by_hour = Counter()
+        self.by_agent = Counter()
+        self.latency = LatencyHistogram()
+
+    # ----- events -----
+    def order_created(self, order_id, status, city=None, timestamp=None):
+        self._apply(self._add_order, order_id, status, city, timestamp)
+
+    def order_located(self, order_id, city, status):
+        self._apply(self._locate, order_id, city, status)
+
+    def order_assigned(self, order_id, agent_id, agent_name=None):
+        self._apply(self._assign, order_id, agent_id, agent_name)
+
+    def order_status_changed(self, order_id, status, completed_at=None):
+        self._apply(self._change_status, order_id, status, completed_at)
+
+    # ----- internals -----
+    def _apply(self, handler, *args):
+        # Handlers are idempotent, so replaying an event the read already saw is harmless
+        with self._lock:
+            handler(*args)
+            if self._replay is not None:
+                self._replay.append((handler, args))
+
+    def _locate(self, order_id, city, status):
+        order = self.orders.get(order_id)
+        if not order:
+            return
+        self._move(self.by_city, order["city"], city)
+        self._move(self.by_status, order["status"], status)
+        order.update(city=city, status=status)
+
+    def _assign(self, order_id, agent_id, agent_name):
+        order = self.orders.get(order_id)
+        if agent_name:
+            self.agent_names[agent_id] = agent_name
+        if not order or order["agent_id"] == agent_id:
+            return
+        self._move(self.by_agent, order["agent_id"], agent_id)
+        order["agent_id"] = agent_id
+
+    def _change_status(self, order_id, status, completed_at):
+        order = self.orders.get(order_id)
+        if not order:
+            return
+        if status == "completed" and order["status"] != "completed":
+            minutes = _minutes_between(order["timestamp"], completed_at)
+            if minutes is not None:
+                self.latency.add(minutes)
+        self._move(self.by_status, order["status"], status)
+        order["status"] = status
+
+    @staticmethod
+    def _move(counter, old, new):
+        if old == new:
+            return
+        if old is not None:
+            counter[old] -= 1
+            if counter[old] <= 0:
+                del counter[old]
+        if new is not None:
+            counter[new] += 1
+
+    def _add_order(self, order_id, status, city, timestamp, agent_id=None):
+        if order_id in self.orders:
+            return
+        hour = _hour(timestamp)
+        self.orders[order_id] = {
+            "status": status, "city": city, "hour": hour, "timestamp": timestamp, "agent_id": agent_id
+        }
+        for counter, key in ((self.by_status, status), (self.by_city, city), (self.by_hour, hour), (self.by_agent, agent_id)):
+            if key is not None:
+                counter[key] += 1
+        if len(self.by_hour) > self.max_hours:
+            for old in sorted(self.by_hour)[:len(self.by_hour) - self.max_hours]:
+                del self.by_hour[old]
+
+    # ----- reads -----
+    def snapshot(self):
+        with self._lock:
+            return {
+                "total_orders": len(self.orders),
+                "orders_by_status": dict(self.by_status),
+                "orders_by_city": dict(self.by_city.most_common()),
+                "orders_by_hour": dict(sorted(self.by_hour.items())),
+                "deliveries_per_agent": [
+                    {"agent_id": agent_id, "agent": self.agent_names.get(agent_id), "deliveries": n}
+                    for agent_id, n in self.by_agent.most_common()
+                ],
+                "completion_minutes": {
+                    "count": self.latency.total,
+                    "mean": self.latency.sum / self.latency.total if self.latency.total else None,
+                    "p50": self.latency.percentile(0.5),
+                    "p90": self.latency.percentile(0.9),
+                    "p99": self.latency.percentile(0.99),
+                },
+                "reconciled_at": self.reconciled_at,
+            }
+
+    # ----- reconciliation -----
+    async def reconcile(self, repository):
+        """
+        Rebuild every counter from the repository's current orders. Events
+        that arrive while the orders are being read are buffered and
+        replayed on top of the rebuilt counters, so none are lost.
+        """
+        with self._lock:
+            self._replay = []
+        try:
+            rows = await repository.analytics_orders()
+        except BaseException:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._reset()
+            for row in rows:
+                self._add_order(row["order_id"], row["status"], row["city"], row["timestamp"], row["agent_id"])
+                if row["agent_id"] is not None and row.get("agent"):
+                    self.agent_names[row["agent_id"]] = row["agent"]
+                if row["status"] == "completed":
+                    minutes = _minutes_between(row["timestamp"], row.get("completed_at"))
+                    if minutes is not None:
+                        self.latency.add(minutes)
+            for handler, args in replay:
+                handler(*args)
+            self.reconciled_at = datetime.now().isoformat()
+        logger.info(f"Analytics reconciled from {len(rows)} orders")
+
+    async def run_reconciler(self, repository, interval_s=None):
+        interval_s = interval_s or settings.ANALYTICS_RECONCILE_S
+        while True:
+            try:
+                await self.reconcile(repository)
+            except Exception as e:
+                logger.error(f"Analytics reconciliation failed: {e}")
+            await asyncio.sleep(interval_s)
+
+
+analytics = AnalyticsStore()
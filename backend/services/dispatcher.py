@@ -0,0 +1,76 @@
+# backend/services/dispatcher.py
+
+import numpy as np
+from backend.config import settings
+from backend.models.agent import DEFAULT_CAPACITY
+from backend.services.distance_matrix import distance_matrix_km
+
+
+def match_orders_to_agents(orders, agents, max_km=None, time_limit_s=None, candidates=None):
+    """
+    Capacitated assignment of orders to agents, solved with CP-SAT.
+    orders: dicts with order_id, lat, lon, rackets
+    agents: dicts with agent_id, lat, lon, capacity, load (rackets already assigned)
+    An agent takes any set of orders whose rackets fit its free capacity.
+    The solve assigns as many orders as it can, then minimises the total
+    distance of the batch.
+    returns: (assignments [{order_id, agent_id, distance_km}], unassigned [order_id])
+    """
+    if not orders or not agents:
+        return [], [o["order_id"] for o in orders]
+    from ortools.sat.python import cp_model
+
+    order_points = [(o["lat"], o["lon"]) for o in orders]
+    agent_points = [(a["lat"], a["lon"]) for a in agents]
+    distances = distance_matrix_km(order_points, agent_points)  # (orders, agents)
+    rackets = [max(1, int(o.get("rackets") or 1)) for o in orders]
+    free = [(a.get("capacity") or DEFAULT_CAPACITY) - (a.get("load") or 0) for a in agents]
+
+    # Only pairs the agent could take on its own become variables, and
+    # each order only considers its nearest `candidates` agents
+    reachable = distances <= (max_km if max_km is not None else np.inf)
+    candidates = candidates or settings.ASSIGN_CANDIDATES
+    if candidates < len(agents):
+        nearest = np.zeros_like(reachable)
+        np.put_along_axis(nearest, np.argsort(distances, axis=1)[:, :candidates], True, axis=1)
+        reachable &= nearest
+    cost_m = np.rint(distances * 1000).astype(np.int64)
+    model = cp_model.CpModel()
+    x = {}
+    for i, j in zip(*np.nonzero(reachable)):
+        if rackets[i] <= free[j]:
+            x[i, j] = model.NewBoolVar(f"x{i}_{j}")
+    if not x:
+        return [], [o["order_id"] for o in orders]
+
+    by_order, by_agent = {}, {}
+    for (i, j), var in x.items():
+        by_order.setdefault(i, []).append(var)
+        by_agent.setdefault(j, []).append((rackets[i], var))
+    for variables in by_order.values():
+        model.AddAtMostOne(variables)
+    for j, terms in by_agent.items():
+        model.Add(sum(r * var for r, var in terms) <= free[j])
+
+    # Every assigned order outweighs any distance saving, so coverage comes first
+    reward = int(max(cost_m[i, j] for i, j in x)) * len(orders) + 1
+    model.Minimize(sum((int(cost_m[i, j]) - reward) * var for (i, j), var in x.items()))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit_s or settings.ASSIGN_TIME_LIMIT_S
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return [], [o["order_id"] for o in orders]
+
+    assignments = []
+    matched = set()
+    for (i, j), var in x.items():
+        if solver.Value(var):
+            assignments.append({
+                "order_id": orders[i]["order_id"],
+                "agent_id": agents[j]["agent_id"],
+                "distance_km": float(distances[i, j]),
+            })
+            matched.add(i)
+    unassigned = [o["order_id"] for i, o in enumerate(orders) if i not in matched]
+    return assignments, unassigned
@@ -0,0 +1,66 @@
+# backend/services/distance_matrix.py
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_SPEED_KMH = 30
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km. Accepts scalars or broadcastable arrays.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def as_points(locations):
+    """
+    Convert [(lat, lon), ...] into a float64 array of shape (n, 2).
+    """
+    points = np.asarray(locations, dtype=np.float64)
+    if points.size == 0:
+        return points.reshape(0, 2)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("locations must be a sequence of (lat, lon) pairs")
+    return points
+
+
+def distance_matrix_km(origins, destinations=None):
+    """
+    Pairwise great-circle distances in km, computed in one broadcast.
+    origins: (n, 2) lat/lon, destinations: (m, 2) lat/lon (defaults to origins)
+    returns: float64 array of shape (n, m)
+    """
+    a = as_points(origins)
+    b = a if destinations is None else as_points(destinations)
+    return haversine_km(a[:, 0:1], a[:, 1:2], b[None, :, 0], b[None, :, 1])
+
+
+def cost_matrix(origins, destinations=None, scale=1000):
+    """
+    Integer cost matrix for OR-Tools. With the default scale the unit is metres.
+    """
+    return np.rint(distance_matrix_km(origins, destinations) * scale).astype(np.int32)
+
+
+def leg_distances_km(points):
+    """
+    Distance of each consecutive leg along a path of (lat, lon) points.
+    returns: float64 array of length len(points) - 1
+    """
+    p = as_points(points)
+    if len(p) < 2:
+        return np.zeros(0)
+    return haversine_km(p[:-1, 0], p[:-1, 1], p[1:, 0], p[1:, 1])
+
+
+def travel_minutes(cost_m, speed_kmh=DEFAULT_SPEED_KMH):
+    """
+    Convert a metre cost matrix into whole travel minutes (rounded up).
+    """
+    minutes = np.ceil(np.asarray(cost_m, dtype=np.float64) * 60.0 / (speed_kmh * 1000.0))
+    return minutes.astype(np.int32)
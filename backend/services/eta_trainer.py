@@ -0,0 +1,130 @@
+# backend/services/eta_trainer.py
+
+import copy
+import queue
+import threading
+from datetime import datetime
+from backend.config import settings
+from backend.services.distance_matrix import haversine_km
+from backend.services.ml_predictor import FEATURES, get_ml_predictor
+from backend.utils.logger import logger
+
+
+class OnlineRegressor:
+    """
+    Incrementally trainable ETA model: a running StandardScaler feeding an
+    SGDRegressor, both updated with partial_fit. Exposes predict() like
+    any sklearn estimator so MLPredictor can serve it directly.
+    """
+
+    def __init__(self):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
+        self.regressor = SGDRegressor(learning_rate="adaptive", eta0=0.01)
+        self.n_samples = 0
+
+    def partial_fit(self, X, y):
+        self.scaler.partial_fit(X)
+        self.regressor.partial_fit(self.scaler.transform(X), y)
+        self.n_samples += len(X)
+        return self
+
+    def predict(self, X):
+        return self.regressor.predict(self.scaler.transform(X))
+
+
+def completion_sample(record):
+    """
+    (features, actual minutes) for a completed order, or None when the
+    record lacks what is needed. record: dict with timestamp, completed_at,
+    lat, lon, agent_lat, agent_lon and optionally agent_score, traffic_level.
+    """
+    try:
+        started = datetime.fromisoformat(record["timestamp"])
+        finished = datetime.fromisoformat(record["completed_at"])
+        distance = float(haversine_km(record["agent_lat"], record["agent_lon"], record["lat"], record["lon"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    minutes = (finished - started).total_seconds() / 60
+    if minutes <= 0:
+        return None
+    features = {
+        "distance_km": distance,
+        "traffic_level": record.get("traffic_level") or 1.0,
+        "agent_score": record.get("agent_score") or 1.0,
+    }
+    return features, minutes
+
+
+class OnlineETATrainer:
+    """
+    Collects (features, actual duration) pairs from completed orders and
+    trains an OnlineRegressor in mini-batches on a background thread.
+    Each batch trains a copy of the live model, which is then swapped
+    into the predictor, so serving never sees a half-updated model. When
+    another worker has published a newer online model since, the batch
+    starts from that one instead of overwriting its updates.
+    """
+
+    def __init__(self, batch_size=None, flush_interval_s=None, min_samples=None):
+        self.batch_size = batch_size or settings.ETA_TRAIN_BATCH_SIZE
+        self.flush_interval_s = flush_interval_s or settings.ETA_TRAIN_FLUSH_S
+        self.min_samples = min_samples or settings.ETA_TRAIN_MIN_SAMPLES
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.model = None  # latest OnlineRegressor, served once it has min_samples
+        self.version = None  # registry version this trainer last published
+
+    def record(self, features, actual_minutes):
+        """Queue a training sample; never blocks the caller."""
+        self._ensure_started()
+        self._queue.put(([features[name] for name in FEATURES], actual_minutes))
+
+    def record_completion(self, record):
+        sample = completion_sample(record)
+        if sample:
+            self.record(*sample)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="eta-trainer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.flush_interval_s))
+            except queue.Empty:
+                pass
+            try:
+                self.train(batch)
+            except Exception as e:
+                logger.error(f"ETA training batch failed: {e}")
+
+    def train(self, batch):
+        """Update a copy of the current model with one mini-batch and publish it."""
+        import numpy as np
+        X = np.array([features for features, _ in batch], dtype=np.float64)
+        y = np.array([minutes for _, minutes in batch], dtype=np.float64)
+
+        predictor = get_ml_predictor()
+        predictor.reload()
+        current = self.model
+        served_is_newer = self.version is None or (predictor.version or "") > self.version
+        if served_is_newer and isinstance(predictor.model, OnlineRegressor):
+            current = predictor.model
+        model = copy.deepcopy(current) if current is not None else OnlineRegressor()
+        model.partial_fit(X, y)
+        self.model = model
+
+        if model.n_samples >= self.min_samples:
+            self.version = predictor.swap_model(model, source="online", n_samples=model.n_samples)
+            logger.info(f"ETA model updated ({model.n_samples} samples)")
+
+
+eta_trainer = OnlineETATrainer()
@@ -0,0 +1,113 @@
+# backend/services/geocode_cache.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from backend.config import settings
+
+MISSING = object()  # get() default that distinguishes "absent" from a cached miss
+
+
+def normalize_address(address):
+    """
+    Canonical cache key for an address: case, whitespace and punctuation
+    differences between repeat customers' entries map to the same key.
+    """
+    address = address.lower().strip()
+    address = re.sub(r"[.;#]", " ", address)
+    address = re.sub(r"\s*,\s*", ", ", address)
+    address = re.sub(r"\s+", " ", address)
+    return address.strip(" ,")
+
+
+class GeocodeCache:
+    """
+    Two-level geocoding cache: a bounded in-memory LRU in front of a SQLite
+    table shared by every process on the host. Entries expire after ttl_s;
+    "not found" answers are cached too, for negative_ttl_s.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl_s=30 * 86400, negative_ttl_s=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+        return self._conn
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Cached value for key (None for a cached miss), or default if absent/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+            row = self._db().execute(
+                "SELECT value, expires_at FROM geocode WHERE key=?", (key,)
+            ).fetchone()
+            if not row or row[1] <= now:
+                return default
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            return value
+
+    def set(self, key, value):
+        """Store a result; value None records a negative (not found) answer."""
+        ttl = self.negative_ttl_s if value is None else self.ttl_s
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO geocode (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            db.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM geocode WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            db.execute("DELETE FROM geocode")
+            db.commit()
+
+
+geocode_cache = GeocodeCache(
+    settings.GEOCODE_CACHE_PATH,
+    max_entries=settings.GEOCODE_CACHE_SIZE,
+    ttl_s=settings.GEOCODE_CACHE_TTL_S,
+    negative_ttl_s=settings.GEOCODE_NEGATIVE_TTL_S,
+)
@@ -1,10 +1,123 @@
 # backend/services/geocode_client.py
 
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
+from backend.config import settings
+from backend.services.geocode_cache import geocode_cache, normalize_address, MISSING
+from backend.services.offline_geocoder import OfflineGeocoder
+from backend.utils.metrics import span, geocode_lookups
+
+BACKENDS = ("online", "offline", "offline+online")
+
+
+class GeocoderConfigError(RuntimeError):
+    pass
+
+
+def _offline_geocoder():
+    """
+    The local gazetteer when GEOCODER_BACKEND is "offline" or "offline+online".
+    Raises GeocoderConfigError at startup rather than letting every lookup
+    quietly come back empty or fail later.
+    """
+    backend = settings.GEOCODER_BACKEND
+    if backend not in BACKENDS:
+        raise GeocoderConfigError(f"GEOCODER_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+    if not backend.startswith("offline"):
+        return None
+    if not settings.GAZETTEER_PATH:
+        raise GeocoderConfigError(f"GEOCODER_BACKEND={backend} needs GAZETTEER_PATH set to a gazetteer CSV")
+    geocoder = OfflineGeocoder(settings.GAZETTEER_PATH)
+    if not geocoder.available():
+        raise GeocoderConfigError(
+            f"GAZETTEER_PATH {settings.GAZETTEER_PATH!r} is not a readable file and has no prebuilt index "
+            f"at {geocoder.index_dir!r}"
+        )
+    return geocoder
+
+
+# Local gazetteer, used first when GEOCODER_BACKEND is "offline" or "offline+online"
+offline_geocoder = _offline_geocoder()
+USE_OFFLINE = offline_geocoder is not None
+USE_ONLINE = settings.GEOCODER_BACKEND in ("online", "offline+online")
+
+_geolocator = None
+
+
+class GeocodeUnavailable(Exception):
+    """The provider failed or timed out: no answer, unlike a definitive "not found"."""
+
+
+def get_geolocator():
+    """Nominatim geocoder (free, open source), created on first online lookup."""
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent=settings.GEOCODE_USER_AGENT or "badminton_agent_app", timeout=10)
+    return _geolocator
+
+
+def _city_from(location):
+    # Extract city from the address components
+    address_parts = location.address.split(",")
+    return address_parts[-3].strip() if len(address_parts) >= 3 else ""
+
+
+def _query(kind, fn, *args):
+    """
+    Call the provider, retrying once on timeout.
+    Returns (answered, location); answered is False when the provider failed.
+    """
+    from geopy.exc import GeocoderTimedOut
+    with span("geocode", kind):
+        for _ in range(2):
+            try:
+                location = fn(*args)
+                geocode_lookups.inc(kind=kind, result="miss")
+                return True, location
+            except GeocoderTimedOut:
+                continue
+            except Exception:
+                break
+    geocode_lookups.inc(kind=kind, result="error")
+    return False, None
+
+
+def local_geocode(address):
+    """
+    Forward lookup without touching the network: the offline gazetteer and
+    the cache. Returns (lat, lon, city), (None, None, None) when the answer
+    is a known miss, or MISSING when the online provider has to be asked.
+    """
+    if USE_OFFLINE:
+        place = offline_geocoder.geocode(address)
+        if place or not USE_ONLINE:
+            geocode_lookups.inc(kind="forward", result="offline")
+            return place or (None, None, None)
+    if not USE_ONLINE:
+        return None, None, None
+    cached = geocode_cache.get("fwd:" + normalize_address(address), MISSING)
+    if cached is MISSING:
+        return MISSING
+    geocode_lookups.inc(kind="forward", result="hit")
+    return tuple(cached) if cached else (None, None, None)
+
+
+def lookup_address(address):
+    """
+    geocode_address, but a provider error raises GeocodeUnavailable
+    instead of looking like "not found", so callers can retry.
+    """
+    local = local_geocode(address)
+    if local is not MISSING:
+        return local
+    key = "fwd:" + normalize_address(address)
+
+    answered, location = _query("forward", get_geolocator().geocode, address)
+    if not answered:
+        raise GeocodeUnavailable(f"geocoding provider gave no answer for {address!r}")  # don't cache
+    result = (location.latitude, location.longitude, _city_from(location)) if location else None
+    geocode_cache.set(key, result)
+    return result or (None, None, None)
 
-# Initialize Nominatim geocoder (free, open source)
-geolocator = Nominatim(user_agent="badminton_agent_app", timeout=10)
 
 def geocode_address(address):
     """
@@ -12,23 +125,9 @@ def geocode_address(address):
     Returns: (lat, lon, city) or (None, None, None) if not found
     """
     try:
-        location = geolocator.geocode(address)
-        if location:
-            # Extract city from the address components
-            address_parts = location.address.split(",")
-            city = address_parts[-3].strip() if len(address_parts) >= 3 else ""
-            return location.latitude, location.longitude, city
-    except GeocoderTimedOut:
-        # Retry once in case of timeout
-        try:
-            location = geolocator.geocode(address)
-            if location:
-                address_parts = location.address.split(",")
-                city = address_parts[-3].strip() if len(address_parts) >= 3 else ""
-                return location.latitude, location.longitude, city
-        except Exception:
-            pass
-    return None, None, None
+        return lookup_address(address)
+    except GeocodeUnavailable:
+        return None, None, None
 
 
 def reverse_geocode(lat, lon):
@@ -36,15 +135,23 @@ def reverse_geocode(lat, lon):
     Convert latitude and longitude into a human-readable address.
     Returns: address string or None if not found
     """
-    try:
-        location = geolocator.reverse((lat, lon))
-        if location:
-            return location.address
-    except GeocoderTimedOut:
-        try:
-            location = geolocator.reverse((lat, lon))
-            if location:
-                return location.address
-        except Exception:
-            pass
-    return None
+    if USE_OFFLINE:
+        address = offline_geocoder.reverse(lat, lon)
+        if address or not USE_ONLINE:
+            geocode_lookups.inc(kind="reverse", result="offline")
+            return address
+    if not USE_ONLINE:
+        return None
+
+    key = "rev:%.5f,%.5f" % (lat, lon)
+    cached = geocode_cache.get(key, MISSING)
+    if cached is not MISSING:
+        geocode_lookups.inc(kind="reverse", result="hit")
+        return cached
+
+    answered, location = _query("reverse", get_geolocator().reverse, (lat, lon))
+    if not answered:
+        return None
+    result = location.address if location else None
+    geocode_cache.set(key, result)
+    return result
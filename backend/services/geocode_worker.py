@@ -0,0 +1,154 @@
+# backend/services/geocode_worker.py
+
+import asyncio
+import random
+import time
+from backend.config import settings
+from backend.services.geocode_cache import normalize_address, MISSING
+from backend.services.geocode_client import GeocodeUnavailable, local_geocode, lookup_address
+from backend.utils.logger import logger
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `burst` saved up."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeocodeWorker:
+    """
+    Rate-limited geocoding queue for the event loop.
+    Gazetteer and cache hits return immediately; misses are queued, share one lookup per
+    normalized address, and run on worker threads at the provider's rate.
+    Provider errors are retried with backoff; after max_attempts the lookup
+    raises GeocodeUnavailable.
+    """
+
+    def __init__(self, rate_per_s=None, workers=None, max_attempts=None, backoff_s=None):
+        self.rate_per_s = rate_per_s or settings.GEOCODE_RATE_PER_S
+        self.workers = workers or settings.GEOCODE_WORKERS
+        self.max_attempts = max_attempts or settings.GEOCODE_MAX_ATTEMPTS
+        self.backoff_s = backoff_s or settings.GEOCODE_RETRY_BACKOFF_S
+        self._loop = None
+        self._queue = None
+        self._bucket = None
+        self._tasks = []
+        self._inflight = {}  # normalized address -> Future
+        self._background = set()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._bucket = TokenBucket(self.rate_per_s)
+        self._inflight = {}
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    async def _run(self):
+        while True:
+            key, address, future, attempt = await self._queue.get()
+            retrying = False
+            try:
+                await self._bucket.acquire()
+                result = await asyncio.to_thread(lookup_address, address)
+                if not future.done():
+                    future.set_result(result)
+            except GeocodeUnavailable as e:
+                if attempt + 1 < self.max_attempts and not future.done():
+                    # Back off without holding a worker; the address stays in flight
+                    delay = self.backoff_s * 2 ** attempt * random.uniform(0.8, 1.2)
+                    logger.warning(f"Geocoding {address!r} failed (attempt {attempt + 1}), retrying in {delay:.0f}s")
+                    self._loop.call_later(delay, self._queue.put_nowait, (key, address, future, attempt + 1))
+                    retrying = True
+                elif not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                if not retrying:
+                    self._inflight.pop(key, None)
+                self._queue.task_done()
+
+    async def geocode(self, address):
+        """
+        (lat, lon, city) for address, or (None, None, None) if not found.
+        Raises GeocodeUnavailable if the provider kept failing.
+        """
+        local = local_geocode(address)
+        if local is not MISSING:
+            return local
+
+        self._ensure_started()
+        key = normalize_address(address)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._loop.create_future()
+            self._inflight[key] = future
+            self._queue.put_nowait((key, address, future, 0))
+        return await asyncio.shield(future)
+
+    async def geocode_many(self, addresses):
+        """
+        Geocode many addresses concurrently: {address: (lat, lon, city)}, with
+        MISSING for addresses the provider could not answer.
+        """
+        unique = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(*(self.geocode(a) for a in unique), return_exceptions=True)
+        return {
+            address: (
+                MISSING if isinstance(result, GeocodeUnavailable)
+                else (None, None, None) if isinstance(result, Exception)
+                else result
+            )
+            for address, result in zip(unique, results)
+        }
+
+    def submit(self, address, callback):
+        """
+        Geocode in the background and then await callback(lat, lon, city).
+        Returns immediately; the task is kept alive until it finishes. The
+        callback only runs on a definitive answer: if the provider never
+        answers, whatever it would update is left as it is.
+        """
+        async def job():
+            try:
+                lat, lon, city = await self.geocode(address)
+                await callback(lat, lon, city)
+            except GeocodeUnavailable as e:
+                logger.error(f"Geocoding {address!r} gave up after {self.max_attempts} attempts, left unresolved: {e}")
+            except Exception as e:
+                logger.error(f"Background geocoding failed for {address!r}: {e}")
+
+        task = asyncio.get_running_loop().create_task(job())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+
+geocode_worker = GeocodeWorker()
@@ -1,26 +1,175 @@
-import joblib
-import numpy as np
-from sklearn.linear_model import LinearRegression
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from backend.config import settings
+from backend.services.distance_matrix import DEFAULT_SPEED_KMH
+from backend.services.model_registry import ModelRegistry
+from backend.utils.logger import logger
 
-MODEL_PATH = "backend/services/models/eta_model.pkl"
+# Pre-registry location; imported as the first version if found
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "eta_model.pkl")
+
+# Column order the model is trained and served with
+FEATURES = ("distance_km", "traffic_level", "agent_score")
+
+def heuristic_eta(X):
+    """
+    Fallback when no fitted model exists: the estimate_eta travel time at
+    DEFAULT_SPEED_KMH, scaled by traffic_level.
+    """
+    return X[:, 0] / DEFAULT_SPEED_KMH * 60 * X[:, 1]
+
+def _is_fitted(model):
+    from sklearn.utils.validation import check_is_fitted
+    from sklearn.exceptions import NotFittedError
+    try:
+        check_is_fitted(model.regressor if hasattr(model, "regressor") else model)
+        return True
+    except (NotFittedError, TypeError):
+        return False
 
 class MLPredictor:
-    def __init__(self):
-        if os.path.exists(MODEL_PATH):
-            self.model = joblib.load(MODEL_PATH)
-        else:
-            self.model = LinearRegression()
+    def __init__(self, cache_size=1024, registry=None):
+        self.registry = registry or ModelRegistry()
+        self.model = None  # None -> heuristic_eta
+        self.version = None
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # input digest -> predictions
+        self._lock = threading.Lock()
+        self._pointer_mtime = None
+        self._checked_at = 0.0
+        self._import_legacy()
+        self.reload()
+
+    def _import_legacy(self):
+        if self.registry.current_version() is None and os.path.exists(LEGACY_MODEL_PATH):
+            import joblib
+            model = joblib.load(LEGACY_MODEL_PATH)
+            if _is_fitted(model):
+                self.registry.publish(model, source="legacy")
+
+    def reload(self):
+        """
+        Load the registry's current version if it differs from the one being
+        served. Returns the served version (None while on the heuristic).
+        A version that fails to load is retried at the next check.
+        """
+        mtime = self.registry.pointer_mtime()
+        version = self.registry.current_version()
+        self._checked_at = time.monotonic()
+        if version != self.version:
+            try:
+                model, _ = self.registry.load(version)
+            except Exception as e:
+                logger.error(f"Could not load ETA model {version}: {e}")
+                return self.version
+            else:
+                if model is not None and not _is_fitted(model):
+                    logger.error(f"ETA model {version} is not fitted; using heuristic")
+                    model = None
+                with self._lock:
+                    self.model, self.version = model, version
+                    self._cache.clear()
+                logger.info(f"Serving ETA model {version or 'heuristic'}")
+        self._pointer_mtime = mtime
+        return self.version
+
+    def _maybe_reload(self):
+        # Pick up versions published by other workers (one stat per interval)
+        if time.monotonic() - self._checked_at < settings.MODEL_RELOAD_S:
+            return
+        self._checked_at = time.monotonic()
+        if self.registry.pointer_mtime() != self._pointer_mtime:
+            self.reload()
+
+    def _predict(self, X):
+        self._maybe_reload()
+        model = self.model
+        return heuristic_eta(X) if model is None else model.predict(X)
+
+    @staticmethod
+    def to_matrix(table):
+        """
+        Validate a feature table and return it as an (n, len(FEATURES)) float array.
+        table: {column: values} mapping, a pandas DataFrame, or a list of row dicts
+        """
+        import numpy as np
+        if isinstance(table, list):
+            table = {name: [row[name] for row in table] for name in FEATURES} if table else {}
+        columns = set(table.keys()) if not hasattr(table, "columns") else set(table.columns)
+        missing = [name for name in FEATURES if name not in columns]
+        unknown = sorted(columns - set(FEATURES))
+        if missing or unknown:
+            raise ValueError(f"ETA features must be exactly {FEATURES}; missing {missing}, unknown {unknown}")
+        X = np.column_stack([np.asarray(table[name], dtype=np.float64) for name in FEATURES])
+        if not np.isfinite(X).all():
+            raise ValueError("ETA features must be finite numbers")
+        return X
+
+    def predict_batch(self, table):
+        """Predict ETAs (minutes) for every row of a feature table in one model call."""
+        import numpy as np
+        X = self.to_matrix(table)
+        if not len(X):
+            return np.zeros(0)
+        return self._predict(X)
+
+    def predict_route(self, table):
+        """
+        predict_batch for a whole route, cached by the exact inputs so repeated
+        renders of an unchanged route skip the model.
+        """
+        X = self.to_matrix(table)
+        self._maybe_reload()
+        key = hashlib.blake2b(X.tobytes(), digest_size=16).digest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return list(self._cache[key])
+        etas = self._predict(X).tolist() if len(X) else []
+        with self._lock:
+            self._cache[key] = etas
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(etas)
 
     def predict_eta(self, features):
         """
-        features: dict with keys like distance, traffic_level, agent_score
+        features: dict with keys distance_km, traffic_level, agent_score
         """
-        X = np.array([list(features.values())])
-        return self.model.predict(X)[0]
+        return float(self.predict_batch({name: [features[name]] for name in FEATURES})[0])
+
+    def swap_model(self, model, persist=True, **metadata):
+        """
+        Serve model immediately; with persist, also publish it to the registry
+        so other workers pick it up on their next reload check.
+        """
+        version = self.registry.publish(model, **metadata) if persist else self.version
+        if persist and self.registry.current_version() != version:
+            # Another worker published a newer version meanwhile; serve that one
+            self.reload()
+            return version
+        with self._lock:
+            self.model, self.version = model, version
+            self._cache.clear()
+        self._pointer_mtime = self.registry.pointer_mtime()
+        return version
 
     def update_model(self, X_train, y_train):
-        self.model.fit(X_train, y_train)
-        joblib.dump(self.model, MODEL_PATH)
+        # Full refit of a fresh estimator; predictions keep using the old model meanwhile
+        from sklearn.linear_model import LinearRegression
+        model = LinearRegression().fit(X_train, y_train)
+        return self.swap_model(model, source="refit", n_samples=len(X_train))
+
+@lru_cache(maxsize=None)
+def get_ml_predictor():
+    """Shared predictor; the model is loaded on first use."""
+    return MLPredictor()
 
-ml_predictor = MLPredictor()
+def __getattr__(name):
+    if name == "ml_predictor":
+        return get_ml_predictor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
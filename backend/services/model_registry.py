@@ -0,0 +1,131 @@
+# backend/services/model_registry.py
+# Versioned model artifacts on disk:
+#   <root>/<name>/v0001/model.joblib, meta.json
+#   <root>/<name>/CURRENT   -> "v0001"
+# Publishing claims the next version directory with an atomic mkdir, fills
+# it, and then swaps CURRENT with an atomic rename, so readers in any worker
+# process see either the old or the new model, never a partial one, and
+# concurrent publishers never collide on a version.
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from backend.config import settings
+from backend.utils.logger import logger
+
+
+class ModelRegistry:
+    def __init__(self, root=None, name="eta"):
+        self.root = root or settings.MODEL_DIR
+        self.name = name
+        self.path = os.path.join(self.root, name)
+
+    def _pointer(self):
+        return os.path.join(self.path, "CURRENT")
+
+    def versions(self):
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(v for v in os.listdir(self.path) if v.startswith("v") and v[1:].isdigit())
+
+    def current_version(self):
+        try:
+            with open(self._pointer()) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def pointer_mtime(self):
+        """Changes whenever a version is published or rolled back; cheap to poll."""
+        try:
+            return os.stat(self._pointer()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, version=None):
+        version = version or self.current_version()
+        if not version:
+            return None
+        with open(os.path.join(self.path, version, "meta.json")) as f:
+            return json.load(f)
+
+    def load(self, version=None):
+        """
+        (model, metadata) for a version (default: current), or (None, None).
+        Arrays are memory-mapped read-only, so workers loading the same
+        version share the OS page cache instead of each holding a copy.
+        """
+        import joblib
+        version = version or self.current_version()
+        if not version:
+            return None, None
+        model = joblib.load(os.path.join(self.path, version, "model.joblib"), mmap_mode="r")
+        return model, self.metadata(version)
+
+    def _claim_version(self):
+        """Create the next free version directory; mkdir fails if another writer got it first."""
+        existing = self.versions()
+        number = int(existing[-1][1:]) + 1 if existing else 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                os.mkdir(os.path.join(self.path, version))
+                return version
+            except FileExistsError:
+                number += 1
+
+    def publish(self, model, **metadata):
+        """
+        Save model as the next version and make it current, unless another
+        writer has meanwhile made a newer version current. Returns the version.
+        """
+        import joblib
+        os.makedirs(self.path, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.path, prefix=".staging-")
+        version = None
+        try:
+            joblib.dump(model, os.path.join(staging, "model.joblib"))
+            version = self._claim_version()
+            meta = dict(metadata, version=version, model_type=type(model).__name__, created_at=time.time())
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            for name in ("model.joblib", "meta.json"):
+                os.replace(os.path.join(staging, name), os.path.join(self.path, version, name))
+        except Exception:
+            if version:
+                shutil.rmtree(os.path.join(self.path, version), ignore_errors=True)
+            raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        current = self.current_version()
+        if current is None or current < version:
+            self.activate(version)
+        self._prune()
+        logger.info(f"Model registry: published {self.name} {version}")
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at an existing version (publish or rollback)."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown {self.name} model version {version!r}")
+        # A temp file per writer, so concurrent activations never share one
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".CURRENT-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(version)
+            os.replace(tmp, self._pointer())
+        except Exception:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+            raise
+
+    def _prune(self):
+        current = self.current_version()
+        for version in self.versions()[:-settings.MODEL_KEEP_VERSIONS]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.path, version), ignore_errors=True)
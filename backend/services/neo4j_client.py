@@ -1,42 +1,285 @@
-from neo4j import GraphDatabase
 import os
+from functools import lru_cache
+from backend.config import settings
+from backend.services.agent_index import agent_index
+from backend.services.repository import Repository
+from backend.utils.metrics import span
+
+# Customer, Order, PLACED and optional RELATES_TO for one `row`, in one statement
+ORDER_WRITE = (
+    "MERGE (c:Customer {name:row.customer}) "
+    "MERGE (o:Order {order_id:row.order_id}) "
+    "SET o.issue=row.issue, o.status=row.status, o.address=row.address, "
+    "o.lat=row.lat, o.lon=row.lon, o.city=row.city, o.timestamp=row.timestamp "
+    "MERGE (c)-[:PLACED]->(o) "
+    "WITH o, row "
+    "OPTIONAL MATCH (r:Racket {racket_id:row.racket_id}) "
+    "FOREACH (_ IN CASE WHEN r IS NULL THEN [] ELSE [1] END | MERGE (o)-[:RELATES_TO]->(r))"
+)
+ORDER_CREATE = "WITH $row AS row " + ORDER_WRITE
+ORDER_CREATE_BULK = "UNWIND $rows AS row " + ORDER_WRITE
+
+
+# Spatial property backing the point indexes (null when coordinates are unknown)
+POINT = "CASE WHEN $lat IS NULL OR $lon IS NULL THEN null ELSE point({latitude:$lat, longitude:$lon}) END"
+
+AGENT_UPSERT = (
+    "MERGE (a:Agent {agent_id:$agent_id}) "
+    "SET a.name=$name, a.status=$status, a.lat=$lat, a.lon=$lon, a.point=" + POINT + ", "
+    "a.capacity=coalesce($capacity, a.capacity)"
+)
+
+ACTIVE_AGENT_POSITIONS = (
+    "MATCH (a:Agent {status:'active'}) "
+    "OPTIONAL MATCH (a)-[:LOCATED_AT]->(l:Location) "
+    "WITH a, coalesce(l.lat, a.lat) AS lat, coalesce(l.lon, a.lon) AS lon "
+    "WHERE lat IS NOT NULL AND lon IS NOT NULL "
+    "RETURN a.agent_id AS agent_id, a.name AS name, lat, lon"
+)
+
+ASSIGN_ORDER = (
+    "MATCH (a:Agent {agent_id:$agent_id}), (o:Order {order_id:$order_id}) "
+    "MERGE (a)-[:ASSIGNED_TO]->(o)"
+)
+
+SET_ORDER_LOCATION = (
+    "MATCH (o:Order {order_id:$order_id}) "
+    "SET o.lat=$lat, o.lon=$lon, o.city=$city, o.status=$status"
+)
+
+SET_ORDERS_LOCATION = (
+    "UNWIND $order_ids AS order_id "
+    "MATCH (o:Order {order_id:order_id}) "
+    "SET o.lat=$lat, o.lon=$lon, o.city=$city, o.status=$status"
+)
+
+STALE_GEOCODING_ORDERS = (
+    "MATCH (o:Order {status:'geocoding'}) "
+    "WHERE coalesce(o.timestamp, '') < $before "
+    "OPTIONAL MATCH (c)-[:PLACED]->(o) "
+    "RETURN o.order_id AS order_id, c.name AS customer, o.address AS address"
+)
+
+PENDING_ORDERS = (
+    "MATCH (o:Order {status:'pending'}) "
+    "WHERE o.lat IS NOT NULL AND o.lon IS NOT NULL "
+    "AND NOT (:Agent)-[:ASSIGNED_TO]->(o) "
+    "RETURN o.order_id AS order_id, o.lat AS lat, o.lon AS lon, "
+    "coalesce(o.rackets, 1) AS rackets"
+)
+
+ACTIVE_AGENTS_WITH_LOAD = (
+    "MATCH (a:Agent {status:'active'}) "
+    "OPTIONAL MATCH (a)-[:LOCATED_AT]->(l:Location) "
+    "OPTIONAL MATCH (a)-[:ASSIGNED_TO]->(o:Order) WHERE o.status <> 'completed' "
+    "WITH a, l, sum(CASE WHEN o IS NULL THEN 0 ELSE coalesce(o.rackets, 1) END) AS load "
+    "WITH a, coalesce(l.lat, a.lat) AS lat, coalesce(l.lon, a.lon) AS lon, load "
+    "WHERE lat IS NOT NULL AND lon IS NOT NULL "
+    "RETURN a.agent_id AS agent_id, a.name AS name, lat, lon, "
+    "a.capacity AS capacity, load"
+)
+
+ASSIGN_ORDERS_BULK = (
+    "UNWIND $rows AS row "
+    "MATCH (a:Agent {agent_id:row.agent_id}), (o:Order {order_id:row.order_id}) "
+    "MERGE (a)-[:ASSIGNED_TO]->(o)"
+)
+
+# Agent start plus its open, geocoded orders, for route geometry
+AGENT_ROUTE_TAIL = (
+    "OPTIONAL MATCH (a)-[:LOCATED_AT]->(l:Location) "
+    "OPTIONAL MATCH (a)-[:ASSIGNED_TO]->(o:Order) "
+    "WHERE o.status <> 'completed' AND o.lat IS NOT NULL AND o.lon IS NOT NULL "
+    "WITH a, l, collect(o {.order_id, .lat, .lon}) AS orders "
+    "WITH a, coalesce(l.lat, a.lat) AS lat, coalesce(l.lon, a.lon) AS lon, orders "
+    "WHERE lat IS NOT NULL AND lon IS NOT NULL "
+    "RETURN a.agent_id AS agent_id, a.name AS name, lat, lon, orders"
+)
+AGENT_ROUTE = "MATCH (a:Agent {agent_id:$agent_id}) " + AGENT_ROUTE_TAIL
+ACTIVE_AGENT_ROUTES = "MATCH (a:Agent {status:'active'}) " + AGENT_ROUTE_TAIL
+
+GET_AGENT = "MATCH (a:Agent {agent_id:$agent_id}) RETURN a {.*} AS agent"
+
+GET_ORDER = "MATCH (o:Order {order_id:$order_id}) RETURN o {.*} AS order"
+
+# Newest first, keyed on (timestamp, order_id) so a cursor resumes exactly
+# where the previous page ended; undated orders sort last as timestamp "".
+# Rackets are only looked up for returned rows
+CUSTOMER_ORDERS_AFTER = (
+    "MATCH (c:Customer {name:$customer})-[:PLACED]->(o:Order) "
+    "WITH o, coalesce(o.timestamp, '') AS ts "
+    "WHERE NOT $has_cursor OR ts < $after_ts OR (ts = $after_ts AND o.order_id < $after_id) "
+    "WITH o ORDER BY ts DESC, o.order_id DESC "
+)
+CUSTOMER_ORDERS_RETURN = (
+    "OPTIONAL MATCH (o)-[:RELATES_TO]->(r:Racket) "
+    "RETURN o.order_id AS order_id, o.status AS status, "
+    "o.issue AS issue, o.address AS address, o.city AS city, "
+    "o.timestamp AS timestamp, r.brand AS racket_brand, r.type AS racket_type"
+)
+CUSTOMER_ORDERS = CUSTOMER_ORDERS_AFTER + CUSTOMER_ORDERS_RETURN
+CUSTOMER_ORDERS_PAGE = CUSTOMER_ORDERS_AFTER + "LIMIT $limit " + CUSTOMER_ORDERS_RETURN
+
+
+# Also returns what ETA training needs from a completed order
+UPDATE_ORDER_STATUS = (
+    "MATCH (o:Order {order_id:$order_id}) "
+    "SET o.status=$status, o.completed_at=$ts "
+    "WITH o OPTIONAL MATCH (c:Customer)-[:PLACED]->(o) "
+    "OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o) "
+    "RETURN c.name AS customer, o.timestamp AS timestamp, o.completed_at AS completed_at, "
+    "o.lat AS lat, o.lon AS lon, a.agent_id AS agent_id, a.lat AS agent_lat, "
+    "a.lon AS agent_lon, a.score AS agent_score"
+)
+
+DELIVERIES_PER_AGENT = (
+    "MATCH (a:Agent)-[:ASSIGNED_TO]->(o:Order) "
+    "RETURN a.name AS agent, count(o) AS deliveries"
+)
+
+RECENT_ORDERS = (
+    "MATCH (o:Order) "
+    "OPTIONAL MATCH (o)-[:DELIVERED_TO]->(l:Location) "
+    "OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o) "
+    "RETURN o.order_id AS order_id, o.status AS status, o.issue AS issue, "
+    "coalesce(l.address, o.address) AS address, coalesce(l.lat, o.lat) AS lat, "
+    "coalesce(l.lon, o.lon) AS lon, a.name AS agent "
+    "ORDER BY coalesce(o.timestamp, '') DESC LIMIT $limit"
+)
+
+# One row per order, for rebuilding the analytics counters
+ANALYTICS_ORDERS = (
+    "MATCH (o:Order) "
+    "OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o) "
+    "RETURN o.order_id AS order_id, o.status AS status, o.city AS city, "
+    "o.timestamp AS timestamp, o.completed_at AS completed_at, "
+    "a.agent_id AS agent_id, a.name AS agent"
+)
+
+LOCATION_UPSERT = (
+    "MERGE (l:Location {name:$name}) "
+    "SET l.lat=$lat, l.lon=$lon, l.address=coalesce($address, l.address), l.point=" + POINT
+)
+
+LIST_LOCATIONS = "MATCH (l:Location) RETURN l.name AS name, l.lat AS lat, l.lon AS lon, l.address AS address"
+
+# Query text -> constant name, the label query timings are recorded under
+QUERY_NAMES = {
+    value: name for name, value in list(globals().items())
+    if name.isupper() and isinstance(value, str) and name not in ("ORDER_WRITE", "POINT", "AGENT_ROUTE_TAIL")
+}
+
+
+def _connection_args():
+    # Use environment variables for Aura connection
+    uri = os.getenv("NEO4J_URI", "neo4j+s://1d83f2f7.databases.neo4j.io")
+    user = os.getenv("NEO4J_USER", "neo4j")
+    password = os.getenv("NEO4J_PASS", "dOR8KmZJLPfXoupu4s3TzbphGmyNiJUJ0cJEtSV0s74")
+    return uri, (user, password)
+
 
 class Neo4jClient:
     def __init__(self):
-        # Use environment variables for Aura connection
-        uri = os.getenv("NEO4J_URI", "neo4j+s://1d83f2f7.databases.neo4j.io")
-        user = os.getenv("NEO4J_USER", "neo4j")
-        password = os.getenv("NEO4J_PASS", "dOR8KmZJLPfXoupu4s3TzbphGmyNiJUJ0cJEtSV0s74")
-
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        from neo4j import GraphDatabase
+        uri, auth = _connection_args()
+        self.driver = GraphDatabase.driver(uri, auth=auth)
 
     def close(self):
         self.driver.close()
 
     def create_location(self, name, lat, lon):
         with self.driver.session() as session:
-            session.run(
-                "MERGE (l:Location {name:$name}) "
-                "SET l.lat=$lat, l.lon=$lon",
-                name=name, lat=lat, lon=lon
-            )
+            session.run(LOCATION_UPSERT, name=name, lat=lat, lon=lon, address=None)
 
-    def create_agent(self, agent_id, name, status, lat, lon):
+    def create_agent(self, agent_id, name, status, lat, lon, capacity=None):
         with self.driver.session() as session:
             session.run(
-                "MERGE (a:Agent {agent_id:$agent_id}) "
-                "SET a.name=$name, a.status=$status, a.lat=$lat, a.lon=$lon",
-                agent_id=agent_id, name=name, status=status, lat=lat, lon=lon
+                AGENT_UPSERT,
+                agent_id=agent_id, name=name, status=status, lat=lat, lon=lon,
+                capacity=capacity
             )
+        agent_index.upsert(agent_id, lat, lon, status=status, name=name)
+
+    def update_agent_location(self, agent_id, lat, lon):
+        with self.driver.session() as session:
+            record = session.run(
+                "MATCH (a:Agent {agent_id:$agent_id}) "
+                "SET a.lat=$lat, a.lon=$lon, a.point=" + POINT + " "
+                "RETURN a.name AS name, a.status AS status",
+                agent_id=agent_id, lat=lat, lon=lon
+            ).single()
+        if record:
+            agent_index.upsert(agent_id, lat, lon, status=record["status"], name=record["name"])
+
+    def update_agent_status(self, agent_id, status):
+        with self.driver.session() as session:
+            record = session.run(
+                "MATCH (a:Agent {agent_id:$agent_id}) "
+                "OPTIONAL MATCH (a)-[:LOCATED_AT]->(l:Location) "
+                "SET a.status=$status "
+                "RETURN a.name AS name, coalesce(l.lat, a.lat) AS lat, coalesce(l.lon, a.lon) AS lon",
+                agent_id=agent_id, status=status
+            ).single()
+        if record:
+            agent_index.upsert(agent_id, record["lat"], record["lon"], status=status, name=record["name"])
+
+    def get_active_agent_positions(self):
+        with self.driver.session() as session:
+            result = session.run(ACTIVE_AGENT_POSITIONS)
+            return result.data()
 
     def assign_agent_to_order(self, order_id, agent_id):
+        with self.driver.session() as session:
+            session.run(ASSIGN_ORDER, agent_id=agent_id, order_id=order_id)
+
+    def create_customer_order(self, row):
+        """
+        Write a customer's order in one round trip and one transaction.
+        row: dict with order_id, customer, issue, status, address, lat, lon,
+        city, timestamp and racket_id (may be None)
+        """
+        def work(tx):
+            tx.run(ORDER_CREATE, row=row).consume()
+
+        with self.driver.session() as session:
+            session.execute_write(work)
+
+    def create_orders_bulk(self, rows, chunk_size=1000):
+        """Bulk variant of create_customer_order: one UNWIND transaction per chunk."""
+        def work(tx, chunk):
+            tx.run(ORDER_CREATE_BULK, rows=chunk).consume()
+
+        with self.driver.session() as session:
+            for start in range(0, len(rows), chunk_size):
+                session.execute_write(work, rows[start:start + chunk_size])
+
+    def set_order_location(self, order_id, lat, lon, city, status):
         with self.driver.session() as session:
             session.run(
-                "MATCH (a:Agent {agent_id:$agent_id}), (o:Order {order_id:$order_id}) "
-                "MERGE (a)-[:ASSIGNED_TO]->(o)",
-                agent_id=agent_id, order_id=order_id
+                SET_ORDER_LOCATION,
+                order_id=order_id, lat=lat, lon=lon, city=city, status=status
             )
 
+    def get_pending_orders(self):
+        """Unassigned pending orders that have coordinates."""
+        with self.driver.session() as session:
+            result = session.run(PENDING_ORDERS)
+            return result.data()
+
+    def get_active_agents_with_load(self):
+        """Active agents with position, daily capacity and rackets already assigned."""
+        with self.driver.session() as session:
+            result = session.run(ACTIVE_AGENTS_WITH_LOAD)
+            return result.data()
+
+    def assign_orders_bulk(self, assignments):
+        """assignments: [{"order_id": ..., "agent_id": ...}, ...] written in one transaction."""
+        def work(tx):
+            tx.run(ASSIGN_ORDERS_BULK, rows=assignments).consume()
+
+        with self.driver.session() as session:
+            session.execute_write(work)
+
     def create_order(self, order_id, customer_name, address, lat, lon):
         with self.driver.session() as session:
             session.run(
@@ -45,4 +288,154 @@ class Neo4jClient:
                 order_id=order_id, customer_name=customer_name, address=address, lat=lat, lon=lon
             )
 
-neo4j_client = Neo4jClient()
+
+class AsyncNeo4jClient(Repository):
+    """
+    Non-blocking counterpart of Neo4jClient for the FastAPI routes.
+    Sessions come from a bounded pool; reads run as read transactions so a
+    cluster routes them to readers, writes as write transactions.
+    """
+
+    def __init__(self):
+        from neo4j import AsyncGraphDatabase
+        uri, auth = _connection_args()
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=auth,
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_ACQUIRE_TIMEOUT_S,
+        )
+        self.database = settings.NEO4J_DATABASE or None
+
+    async def close(self):
+        await self.driver.close()
+
+    @staticmethod
+    async def _fetch(tx, query, params):
+        result = await tx.run(query, params)
+        return await result.data()
+
+    async def read(self, query, **params):
+        """Run a read query in a managed read transaction; returns a list of dicts."""
+        with span("neo4j", QUERY_NAMES.get(query, "adhoc")):
+            async with self.driver.session(database=self.database) as session:
+                return await session.execute_read(self._fetch, query, params)
+
+    async def write(self, query, **params):
+        """Run a write query in a managed write transaction; returns the records."""
+        with span("neo4j", QUERY_NAMES.get(query, "adhoc")):
+            async with self.driver.session(database=self.database) as session:
+                return await session.execute_write(self._fetch, query, params)
+
+    async def create_agent(self, agent_id, name, status, lat, lon, capacity=None):
+        await self.write(
+            AGENT_UPSERT, agent_id=agent_id, name=name, status=status, lat=lat, lon=lon,
+            capacity=capacity
+        )
+        agent_index.upsert(agent_id, lat, lon, status=status, name=name)
+
+    async def get_agent(self, agent_id):
+        records = await self.read(GET_AGENT, agent_id=agent_id)
+        return records[0]["agent"] if records else None
+
+    async def get_active_agent_positions(self):
+        return await self.read(ACTIVE_AGENT_POSITIONS)
+
+    async def get_agent_routes(self, agent_id=None):
+        if agent_id is None:
+            return await self.read(ACTIVE_AGENT_ROUTES)
+        return await self.read(AGENT_ROUTE, agent_id=agent_id)
+
+    async def get_order(self, order_id):
+        records = await self.read(GET_ORDER, order_id=order_id)
+        return records[0]["order"] if records else None
+
+    async def assign_order_to_agent(self, order_id, agent_id):
+        await self.write(ASSIGN_ORDER, agent_id=agent_id, order_id=order_id)
+
+    async def create_customer_order(self, row):
+        await self.write(ORDER_CREATE, row=row)
+
+    async def create_orders_bulk(self, rows, chunk_size=1000):
+        for start in range(0, len(rows), chunk_size):
+            await self.write(ORDER_CREATE_BULK, rows=rows[start:start + chunk_size])
+
+    async def set_order_location(self, order_id, lat, lon, city, status):
+        await self.write(SET_ORDER_LOCATION, order_id=order_id, lat=lat, lon=lon, city=city, status=status)
+
+    async def set_orders_location(self, order_ids, lat, lon, city, status):
+        await self.write(SET_ORDERS_LOCATION, order_ids=order_ids, lat=lat, lon=lon, city=city, status=status)
+
+    async def stale_geocoding_orders(self, before):
+        return await self.read(STALE_GEOCODING_ORDERS, before=before)
+
+    async def update_order_status(self, order_id, status, ts):
+        records = await self.write(UPDATE_ORDER_STATUS, order_id=order_id, status=status, ts=ts)
+        return records[0] if records else None
+
+    @staticmethod
+    def _cursor_params(after):
+        after_ts, after_id = after or (None, None)
+        return {"has_cursor": after is not None, "after_ts": after_ts or "", "after_id": after_id}
+
+    async def get_customer_orders(self, customer_name, limit=None, after=None):
+        params = self._cursor_params(after)
+        if limit is None:
+            return await self.read(CUSTOMER_ORDERS, customer=customer_name, **params)
+        return await self.read(CUSTOMER_ORDERS_PAGE, customer=customer_name, limit=limit, **params)
+
+    async def stream_customer_orders(self, customer_name, after=None):
+        # Auto-commit read so records are yielded as the server sends them
+        from neo4j import READ_ACCESS
+        params = self._cursor_params(after)
+        # Timed to the first record: the span can't be held open across yields
+        async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            with span("neo4j", "CUSTOMER_ORDERS_STREAM"):
+                result = await session.run(CUSTOMER_ORDERS, customer=customer_name, **params)
+            async for record in result:
+                yield record.data()
+
+    async def get_pending_orders(self):
+        return await self.read(PENDING_ORDERS)
+
+    async def get_active_agents_with_load(self):
+        return await self.read(ACTIVE_AGENTS_WITH_LOAD)
+
+    async def assign_orders_bulk(self, assignments):
+        await self.write(ASSIGN_ORDERS_BULK, rows=assignments)
+
+    async def deliveries_per_agent(self):
+        return await self.read(DELIVERIES_PER_AGENT)
+
+    async def recent_orders(self, limit=50):
+        return await self.read(RECENT_ORDERS, limit=limit)
+
+    async def analytics_orders(self):
+        return await self.read(ANALYTICS_ORDERS)
+
+    async def create_location(self, name, lat, lon, address=None):
+        await self.write(LOCATION_UPSERT, name=name, lat=lat, lon=lon, address=address)
+
+    async def list_locations(self):
+        return await self.read(LIST_LOCATIONS)
+
+
+@lru_cache(maxsize=None)
+def get_neo4j_client():
+    """Shared sync client; the driver is created on first use."""
+    return Neo4jClient()
+
+
+@lru_cache(maxsize=None)
+def get_async_neo4j_client():
+    """Shared async client; the driver is created on first use."""
+    return AsyncNeo4jClient()
+
+
+def __getattr__(name):
+    # Keep `from ... import neo4j_client` working without connecting at import time
+    if name == "neo4j_client":
+        return get_neo4j_client()
+    if name == "async_neo4j_client":
+        return get_async_neo4j_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
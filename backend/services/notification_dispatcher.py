@@ -0,0 +1,292 @@
+# backend/services/notification_dispatcher.py
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from backend.config import settings
+from backend.utils.logger import logger
+from backend.utils.metrics import span
+
+
+# --------------------------
+# Transports
+# --------------------------
+class TwilioTransport:
+    """Sends one SMS through Twilio; raises on failure so the dispatcher can retry."""
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        # Twilio's SDK is slow to import; only pay for it when a message is sent
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        return self._client
+
+    def send(self, to, body):
+        message = self.client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to)
+        return message.sid
+
+
+class FakeTransport:
+    """
+    Local stand-in for Twilio: records messages instead of sending them.
+    The first `fail_times` sends raise, to exercise retries.
+    """
+
+    def __init__(self, fail_times=0, latency_s=0.0):
+        self.sent = []  # (to, body)
+        self.fail_times = fail_times
+        self.latency_s = latency_s
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("fake transport failure")
+            self.sent.append((to, body))
+            return f"FAKE{len(self.sent):06d}"
+
+
+def make_transport(name=None):
+    name = name or settings.NOTIFY_TRANSPORT
+    if name == "fake":
+        return FakeTransport()
+    return TwilioTransport()
+
+
+# --------------------------
+# Outbox
+# --------------------------
+class NotificationOutbox:
+    """
+    SQLite-backed queue of outgoing messages, so nothing is lost on a crash.
+    The first message to a phone is due immediately; later ones arriving
+    within coalesce_s of it are held until the window ends and merged into
+    one SMS. An identical line is only sent once.
+    """
+
+    def __init__(self, path, coalesce_s=30.0):
+        self.path = path
+        self.coalesce_s = coalesce_s
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY, phone TEXT, body TEXT, status TEXT, attempts INTEGER, "
+                "next_attempt_at REAL, created_at REAL, sent_at REAL, sid TEXT, last_error TEXT, "
+                "claimed_at REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if "claimed_at" not in columns:  # outboxes created before claims were leased
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_phone ON outbox (phone, status)")
+        return self._conn
+
+    def add(self, phone, body):
+        """
+        Queue body for phone. Returns the outbox id, which is shared with
+        any still-unsent message it was coalesced into.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT id, body FROM outbox WHERE phone=? AND status='pending' AND attempts=0 "
+                    "ORDER BY id DESC LIMIT 1", (phone,)
+                ).fetchone()
+                if row:
+                    message_id, pending = row
+                    if body not in pending.split("\n"):
+                        db.execute("UPDATE outbox SET body=? WHERE id=?", (pending + "\n" + body, message_id))
+                else:
+                    # Hold it only if another message to this phone started a window
+                    last = db.execute(
+                        "SELECT MAX(created_at) FROM outbox WHERE phone=? AND created_at>?",
+                        (phone, now - self.coalesce_s)
+                    ).fetchone()[0]
+                    due_at = now if last is None else last + self.coalesce_s
+                    message_id = db.execute(
+                        "INSERT INTO outbox (phone, body, status, attempts, next_attempt_at, created_at) "
+                        "VALUES (?, ?, 'pending', 0, ?, ?)", (phone, body, due_at, now)
+                    ).lastrowid
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return message_id
+
+    def claim_due(self, limit):
+        """Mark up to `limit` due messages as sending and return them."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute(
+                "SELECT id, phone, body, attempts FROM outbox WHERE status='pending' AND next_attempt_at<=? "
+                "ORDER BY next_attempt_at LIMIT ?", (now, limit)
+            ).fetchall()
+            db.executemany(
+                "UPDATE outbox SET status='sending', claimed_at=? WHERE id=?", [(now, r[0]) for r in rows]
+            )
+            db.execute("COMMIT")
+        return rows
+
+    def next_due_at(self):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status='pending'"
+            ).fetchone()
+        return row[0]
+
+    def mark_sent(self, message_id, sid):
+        with self._lock:
+            self._db().execute(
+                "UPDATE outbox SET status='sent', sent_at=?, sid=? WHERE id=?", (time.time(), sid, message_id)
+            )
+
+    def mark_failed(self, message_id, attempts, error, retry_at=None):
+        """Schedule a retry at retry_at, or give up when it is None."""
+        status = "pending" if retry_at else "failed"
+        with self._lock:
+            self._db().execute(
+                "UPDATE outbox SET status=?, attempts=?, next_attempt_at=?, last_error=? WHERE id=?",
+                (status, attempts, retry_at, str(error)[:500], message_id)
+            )
+
+    def requeue_interrupted(self, lease_s):
+        """
+        Messages claimed more than lease_s ago and still 'sending' were left
+        by a crashed process and go back in the queue. Newer claims may
+        belong to another live worker sharing the outbox and are left alone.
+        """
+        with self._lock:
+            return self._db().execute(
+                "UPDATE outbox SET status='pending' WHERE status='sending' "
+                "AND (claimed_at IS NULL OR claimed_at<?)", (time.time() - lease_s,)
+            ).rowcount
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
+# --------------------------
+# Dispatcher
+# --------------------------
+class NotificationDispatcher:
+    """
+    Drains the outbox on the event loop: up to `workers` sends in flight,
+    each on a worker thread, with exponential backoff between attempts.
+    Callers only enqueue; started lazily on the first enqueue from a loop,
+    and it stays on that loop until stopped.
+    """
+
+    def __init__(self, outbox=None, transport=None, workers=None, max_attempts=None, backoff_s=None,
+                 lease_s=None):
+        self.outbox = outbox or NotificationOutbox(settings.NOTIFY_OUTBOX_PATH, settings.NOTIFY_COALESCE_S)
+        self.transport = transport or make_transport()
+        self.workers = workers or settings.NOTIFY_WORKERS
+        self.max_attempts = max_attempts or settings.NOTIFY_MAX_ATTEMPTS
+        self.backoff_s = backoff_s or settings.NOTIFY_BACKOFF_S
+        self.lease_s = lease_s or settings.NOTIFY_LEASE_S
+        self._next_requeue = 0.0
+        self._loop = None
+        self._task = None
+        self._wake = None
+        self._inflight = set()
+
+    def enqueue(self, to, body):
+        """
+        Persist the message and nudge the dispatcher. Safe from any thread:
+        the owning loop is woken through call_soon_threadsafe.
+        """
+        message_id = self.outbox.add(to, body)
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            pass  # no running loop here; sent once the API's loop starts the dispatcher
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._wake.set)
+        return message_id
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop or (self._loop is not None and self._loop.is_running()):
+            return  # already draining, possibly on another thread's loop
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def start(self):
+        self._ensure_started()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        self._task = None
+        self._loop = None
+        self._next_requeue = 0.0
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            if time.time() >= self._next_requeue:
+                self.outbox.requeue_interrupted(self.lease_s)
+                self._next_requeue = time.time() + min(self.lease_s, 60.0)
+            free = self.workers - len(self._inflight)
+            for message in (self.outbox.claim_due(free) if free else []):
+                task = asyncio.create_task(self._deliver(message))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            due_at = self.outbox.next_due_at()
+            timeout = 60.0 if due_at is None else max(0.05, due_at - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, message):
+        message_id, phone, body, attempts = message
+        try:
+            with span("notify", type(self.transport).__name__):
+                sid = await asyncio.to_thread(self.transport.send, phone, body)
+            self.outbox.mark_sent(message_id, sid)
+            logger.info(f"Message sent to {phone}: {sid}")
+        except Exception as e:
+            attempts += 1
+            retry_at = None
+            if attempts < self.max_attempts:
+                retry_at = time.time() + self.backoff_s * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            self.outbox.mark_failed(message_id, attempts, e, retry_at)
+            if retry_at:
+                logger.warning(f"Send to {phone} failed (attempt {attempts}), retrying: {e}")
+            else:
+                logger.error(f"Giving up on message {message_id} to {phone} after {attempts} attempts: {e}")
+        finally:
+            self._inflight.discard(asyncio.current_task())
+            self._wake.set()
+
+
+notification_dispatcher = NotificationDispatcher()
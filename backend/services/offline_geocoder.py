@@ -0,0 +1,219 @@
+# backend/services/offline_geocoder.py
+
+import csv
+import difflib
+import os
+import re
+import numpy as np
+from backend.services.distance_matrix import haversine_km
+from backend.services.geocode_cache import normalize_address
+from backend.utils.logger import logger
+
+KM_PER_DEG_LAT = 111.32
+INDEX_FILES = ("keys", "key_rows", "coords", "names", "cities", "postcodes", "lat_order", "lat_sorted")
+POSTCODE_RE = re.compile(r"\b\d{5,6}\b")
+HOUSE_NUMBER_RE = re.compile(r"^\d+[a-z]?\s*,?\s*")
+MIN_PREFIX_LEN = 5  # shorter queries must match a key exactly
+IGNORED_PARTS = {"india"}
+
+
+def build_index(csv_path, index_dir):
+    """
+    Compile a gazetteer CSV (columns: name, city, postcode, lat, lon) into
+    .npy arrays that load memory-mapped. Every row is indexed under its
+    name, "name, city" and postcode, sorted for binary search.
+    """
+    names, cities, postcodes, coords = [], [], [], []
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                coords.append((float(row["lat"]), float(row["lon"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            names.append((row.get("name") or "").strip())
+            cities.append((row.get("city") or "").strip())
+            postcodes.append((row.get("postcode") or "").strip())
+
+    keys, key_rows = [], []
+    for i, (name, city, postcode) in enumerate(zip(names, cities, postcodes)):
+        for key in {normalize_address(name), normalize_address(f"{name}, {city}"), postcode.lower()}:
+            if key:
+                keys.append(key)
+                key_rows.append(i)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+
+    coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+    lat_order = np.argsort(coords[:, 0], kind="stable").astype(np.int32)
+    arrays = {
+        "keys": np.array([keys[i] for i in order], dtype=str),
+        "key_rows": np.array([key_rows[i] for i in order], dtype=np.int32),
+        "coords": coords,
+        "names": np.array(names, dtype=str),
+        "cities": np.array(cities, dtype=str),
+        "postcodes": np.array(postcodes, dtype=str),
+        "lat_order": lat_order,
+        "lat_sorted": coords[lat_order, 0],
+    }
+    os.makedirs(index_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, name + ".npy"), array)
+    logger.info(f"Built gazetteer index with {len(names)} places in {index_dir}")
+
+
+class OfflineGeocoder:
+    """
+    Forward and reverse geocoding against a local gazetteer index.
+    Forward lookups try the postcode, then exact/prefix matches on the
+    address and its comma-separated parts, then fuzzy matching; reverse
+    lookups search a latitude band for the nearest place.
+    """
+
+    def __init__(self, csv_path, index_dir=None):
+        self.csv_path = csv_path
+        self.index_dir = index_dir or os.path.splitext(csv_path)[0] + "_index"
+        self._arrays = None
+
+    def available(self):
+        """True if there is something to load: a readable CSV or a complete prebuilt index."""
+        if os.path.isfile(self.csv_path) and os.access(self.csv_path, os.R_OK):
+            return True
+        return all(os.path.isfile(os.path.join(self.index_dir, name + ".npy")) for name in INDEX_FILES)
+
+    def _load(self):
+        if self._arrays is None:
+            paths = [os.path.join(self.index_dir, name + ".npy") for name in INDEX_FILES]
+            stale = not all(os.path.exists(p) for p in paths) or (
+                os.path.exists(self.csv_path)
+                and os.path.getmtime(self.csv_path) > min(os.path.getmtime(p) for p in paths)
+            )
+            if stale:
+                build_index(self.csv_path, self.index_dir)
+            self._arrays = {
+                name: np.load(path, mmap_mode="r") for name, path in zip(INDEX_FILES, paths)
+            }
+        return self._arrays
+
+    def _place(self, row):
+        a = self._arrays
+        lat, lon = a["coords"][row]
+        return float(lat), float(lon), str(a["cities"][row])
+
+    def _prefix(self, query):
+        keys = self._arrays["keys"]
+        lo = int(np.searchsorted(keys, query, side="left"))
+        hi = int(np.searchsorted(keys, query + "\uffff", side="right"))
+        return lo, hi
+
+    def _fuzzy(self, query, cutoff=0.8, window=200):
+        # Candidates share the first two characters, so the scan stays small
+        keys = self._arrays["keys"]
+        lo, hi = self._prefix(query[:2])
+        hi = min(hi, lo + window)
+        candidates = [str(k) for k in keys[lo:hi]]
+        match = difflib.get_close_matches(query, candidates, n=1, cutoff=cutoff)
+        if not match:
+            return None
+        return int(np.searchsorted(keys, match[0], side="left"))
+
+    def _exact(self, key):
+        lo, hi = self._prefix(key)
+        if lo < hi and str(self._arrays["keys"][lo]) == key:
+            return int(self._arrays["key_rows"][lo])
+        return None
+
+    def _whole_word_prefix(self, query):
+        """Row whose key starts with query followed by a word break, if exactly one place does."""
+        if len(query) < MIN_PREFIX_LEN:
+            return None
+        lo, hi = self._prefix(query)
+        keys, key_rows = self._arrays["keys"], self._arrays["key_rows"]
+        rows = {
+            int(key_rows[i]) for i in range(lo, hi)
+            if len(str(keys[i])) == len(query) or str(keys[i])[len(query)] in " ,"
+        }
+        return rows.pop() if len(rows) == 1 else None
+
+    def _city_agrees(self, row, others):
+        """
+        A match on part of the address only counts if the rest of it names
+        no other city: when other parts remain, one must be the place's city.
+        """
+        others = [p for p in others if p not in IGNORED_PARTS and not POSTCODE_RE.fullmatch(p)]
+        return not others or normalize_address(str(self._arrays["cities"][row])) in others
+
+    def geocode(self, address):
+        """
+        (lat, lon, city) or None if the gazetteer has no confident match, in
+        which case the online provider (if enabled) is asked instead.
+        """
+        a = self._load()
+        if not len(a["keys"]):
+            return None
+        query = normalize_address(address)
+
+        postcode = POSTCODE_RE.search(query)
+        if postcode:
+            row = self._exact(postcode.group())
+            if row is not None:
+                return self._place(row)
+
+        stripped = HOUSE_NUMBER_RE.sub("", query)
+        parts = [p.strip() for p in stripped.split(",") if p.strip()]
+
+        # The whole address: exact, then as an unambiguous whole-word prefix
+        for candidate in dict.fromkeys([query, stripped]):
+            row = self._exact(candidate)
+            if row is None:
+                row = self._whole_word_prefix(candidate)
+            if row is not None:
+                return self._place(row)
+
+        # "name, city" pairs and single parts: exact keys only, and the
+        # remaining parts must not point at a different city
+        spans = [(i, i + 2) for i in range(len(parts) - 1)] + [(i, i + 1) for i in range(len(parts))]
+        for start, end in spans:
+            row = self._exact(", ".join(parts[start:end]))
+            if row is not None and self._city_agrees(row, parts[:start] + parts[end:]):
+                return self._place(row)
+
+        for i, candidate in enumerate(parts):
+            if len(candidate) < MIN_PREFIX_LEN:
+                continue
+            position = self._fuzzy(candidate)
+            if position is None:
+                continue
+            row = int(a["key_rows"][position])
+            if self._city_agrees(row, parts[:i] + parts[i + 1:]):
+                return self._place(row)
+        return None
+
+    def nearest(self, lat, lon, radius_km=1.0):
+        """Row index of the nearest place, widening the latitude band until one is found."""
+        a = self._load()
+        lat_sorted = a["lat_sorted"]
+        n = len(lat_sorted)
+        if not n:
+            return None
+        while True:
+            delta = radius_km / KM_PER_DEG_LAT
+            lo = int(np.searchsorted(lat_sorted, lat - delta, side="left"))
+            hi = int(np.searchsorted(lat_sorted, lat + delta, side="right"))
+            if hi > lo:
+                rows = np.asarray(a["lat_order"][lo:hi])
+                dist = haversine_km(lat, lon, a["coords"][rows, 0], a["coords"][rows, 1])
+                best = int(np.argmin(dist))
+                # Only trust the band once the best hit lies inside it
+                if dist[best] <= radius_km or (lo == 0 and hi == n):
+                    return int(rows[best])
+            if lo == 0 and hi == n:
+                return None
+            radius_km *= 4
+
+    def reverse(self, lat, lon):
+        """Human-readable "name, city, postcode" for the nearest place, or None."""
+        row = self.nearest(lat, lon)
+        if row is None:
+            return None
+        a = self._arrays
+        parts = [str(a["names"][row]), str(a["cities"][row]), str(a["postcodes"][row])]
+        return ", ".join(p for p in parts if p)
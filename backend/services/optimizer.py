@@ -1,6 +1,17 @@
-from ortools.constraint_solver import routing_enums_pb2
-from ortools.constraint_solver import pywrapcp
-import numpy as np
+from backend.services.distance_matrix import cost_matrix, travel_minutes, DEFAULT_SPEED_KMH
+from backend.config import settings
+from backend.utils.metrics import span, record_solve
+
+DAY_MINUTES = 24 * 60
+
+
+def _solve(kind, nodes, solve, *args):
+    """Run an OR-Tools solve, recording its time, model size and objective."""
+    with span("ortools", kind):
+        solution = solve(*args)
+    record_solve(kind, nodes, solution.ObjectiveValue() if solution else None)
+    return solution
+
 
 class RouteOptimizer:
     @staticmethod
@@ -12,20 +23,16 @@ class RouteOptimizer:
         n = len(locations)
         if n <= 1:
             return list(range(n))
+        from ortools.constraint_solver import routing_enums_pb2, pywrapcp
 
-        # Create distance matrix
-        dist_matrix = np.zeros((n, n))
-        for i in range(n):
-            for j in range(n):
-                dist_matrix[i][j] = np.sqrt(
-                    (locations[i][0]-locations[j][0])**2 + (locations[i][1]-locations[j][1])**2
-                )
+        # Distance matrix in metres, plain Python ints for the transit callback
+        cost = cost_matrix(locations).tolist()
 
         manager = pywrapcp.RoutingIndexManager(n, 1, 0)
         routing = pywrapcp.RoutingModel(manager)
 
         def distance_callback(from_index, to_index):
-            return int(dist_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)] * 1000)
+            return cost[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
 
         transit_callback_index = routing.RegisterTransitCallback(distance_callback)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
@@ -35,7 +42,7 @@ class RouteOptimizer:
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
         )
 
-        solution = routing.SolveWithParameters(search_params)
+        solution = _solve("shortest_route", n, routing.SolveWithParameters, search_params)
         if solution:
             index = routing.Start(0)
             route = []
@@ -45,4 +52,181 @@ class RouteOptimizer:
             return route
         return list(range(n))
 
+    @staticmethod
+    def solve_fleet(agents, orders, time_limit_s=None, time_windows=False,
+                    speed_kmh=DEFAULT_SPEED_KMH, start_minute=0):
+        """
+        Route every active agent in one OR-Tools model.
+        agents: list of Agent (start at agent.lat/lon, agent.capacity rackets per day)
+        orders: list of Order (order.rackets of demand each)
+        returns: {"routes": {agent_id: [order_id, ...]},
+                  "distance_m": {agent_id: int}, "unassigned": [order_id, ...]}
+        Routes are open: an agent does not return to its start.
+
+        With time_windows=True, travel time comes from the distance matrix at
+        speed_kmh, each stop takes order.service_minutes per racket, stops must
+        start inside [window_start, window_end] (minutes after midnight), and
+        agents leave no earlier than start_minute. The result then also carries
+        "arrivals": {agent_id: [minute, ...]} aligned with "routes".
+        """
+        agents = [
+            a for a in agents
+            if a.status == "active" and a.lat is not None and a.lon is not None
+        ]
+        routable = [o for o in orders if o.lat is not None and o.lon is not None]
+        unassigned = [o.order_id for o in orders if o.lat is None or o.lon is None]
+        result = {
+            "routes": {a.agent_id: [] for a in agents},
+            "distance_m": {a.agent_id: 0 for a in agents},
+            "unassigned": unassigned,
+        }
+        if time_windows:
+            result["arrivals"] = {a.agent_id: [] for a in agents}
+        if not agents or not routable:
+            result["unassigned"] += [o.order_id for o in routable]
+            return result
+
+        from ortools.constraint_solver import routing_enums_pb2, pywrapcp
+
+        # Nodes: agent starts, then orders, then one shared zero-cost end node
+        n_agents = len(agents)
+        points = [(a.lat, a.lon) for a in agents] + [(o.lat, o.lon) for o in routable]
+        end = len(points)
+        cost_m = cost_matrix(points)
+        cost = [row + [0] for row in cost_m.tolist()]
+        cost.append([0] * (end + 1))
+        demand = [0] * n_agents + [o.rackets for o in routable] + [0]
+
+        manager = pywrapcp.RoutingIndexManager(
+            end + 1, n_agents, list(range(n_agents)), [end] * n_agents
+        )
+        routing = pywrapcp.RoutingModel(manager)
+
+        def distance_callback(from_index, to_index):
+            return cost[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+        def demand_callback(from_index):
+            return demand[manager.IndexToNode(from_index)]
+
+        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        routing.AddDimensionWithVehicleCapacity(
+            demand_callback_index, 0, [a.capacity for a in agents], True, "Capacity"
+        )
+
+        if time_windows:
+            travel = [row + [0] for row in travel_minutes(cost_m, speed_kmh).tolist()]
+            travel.append([0] * (end + 1))
+            service = [0] * n_agents + [o.service_minutes * o.rackets for o in routable] + [0]
+
+            def time_callback(from_index, to_index):
+                from_node = manager.IndexToNode(from_index)
+                return service[from_node] + travel[from_node][manager.IndexToNode(to_index)]
+
+            time_callback_index = routing.RegisterTransitCallback(time_callback)
+            routing.AddDimension(time_callback_index, DAY_MINUTES, DAY_MINUTES, False, "Time")
+            time_dimension = routing.GetDimensionOrDie("Time")
+            for node, order in enumerate(routable, n_agents):
+                time_dimension.CumulVar(manager.NodeToIndex(node)).SetRange(
+                    order.window_start if order.window_start is not None else 0,
+                    order.window_end if order.window_end is not None else DAY_MINUTES,
+                )
+            for vehicle in range(n_agents):
+                start_var = time_dimension.CumulVar(routing.Start(vehicle))
+                start_var.SetRange(start_minute, DAY_MINUTES)
+                routing.AddVariableMinimizedByFinalizer(start_var)
+
+        # Orders may be dropped when capacity runs out; the penalty exceeds any detour
+        penalty = 2 * max(max(row) for row in cost) + 1
+        for node in range(n_agents, end):
+            routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
+
+        search_params = pywrapcp.DefaultRoutingSearchParameters()
+        search_params.first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        )
+        search_params.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        )
+        if time_limit_s is None:
+            time_limit_s = settings.ROUTE_TIME_LIMIT_S
+        search_params.time_limit.FromMilliseconds(int(time_limit_s * 1000))
+
+        solution = _solve("fleet", end + 1, routing.SolveWithParameters, search_params)
+        if not solution:
+            result["unassigned"] += [o.order_id for o in routable]
+            return result
+
+        visited = set()
+        for vehicle, agent in enumerate(agents):
+            index = routing.Start(vehicle)
+            distance = 0
+            while not routing.IsEnd(index):
+                next_index = solution.Value(routing.NextVar(index))
+                node = manager.IndexToNode(index)
+                if node >= n_agents:
+                    result["routes"][agent.agent_id].append(routable[node - n_agents].order_id)
+                    if time_windows:
+                        result["arrivals"][agent.agent_id].append(
+                            solution.Min(time_dimension.CumulVar(index))
+                        )
+                    visited.add(node)
+                distance += routing.GetArcCostForVehicle(index, next_index, vehicle)
+                index = next_index
+            result["distance_m"][agent.agent_id] = distance
+        result["unassigned"] += [
+            o.order_id for node, o in enumerate(routable, n_agents) if node not in visited
+        ]
+        return result
+
+    @staticmethod
+    def improve_route(cost, route, time_limit_s=1.0):
+        """
+        Warm-start re-optimization of one open route.
+        cost: n x n integer matrix, node 0 is the agent's start
+        route: current visiting order of nodes 1..n-1 (start excluded)
+        returns: improved visiting order (start excluded)
+        """
+        n = len(cost)
+        if n <= 2:
+            return list(route)
+        from ortools.constraint_solver import routing_enums_pb2, pywrapcp
+
+        end = n
+        manager = pywrapcp.RoutingIndexManager(n + 1, 1, [0], [end])
+        routing = pywrapcp.RoutingModel(manager)
+
+        def distance_callback(from_index, to_index):
+            from_node = manager.IndexToNode(from_index)
+            to_node = manager.IndexToNode(to_index)
+            if from_node == end or to_node == end:
+                return 0
+            return cost[from_node][to_node]
+
+        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+        search_params = pywrapcp.DefaultRoutingSearchParameters()
+        search_params.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        )
+        search_params.time_limit.FromMilliseconds(int(time_limit_s * 1000))
+
+        routing.CloseModelWithParameters(search_params)
+        initial = routing.ReadAssignmentFromRoutes([list(route)], True)
+        if initial is None:
+            return list(route)
+        solution = _solve("improve_route", n + 1, routing.SolveFromAssignmentWithParameters, initial, search_params)
+        if not solution:
+            return list(route)
+
+        improved = []
+        index = solution.Value(routing.NextVar(routing.Start(0)))
+        while not routing.IsEnd(index):
+            improved.append(manager.IndexToNode(index))
+            index = solution.Value(routing.NextVar(index))
+        return improved
+
 optimizer = RouteOptimizer()
@@ -0,0 +1,218 @@
+# backend/services/order_import.py
+# Bulk order ingest: parses a streamed CSV/NDJSON upload row by row,
+# validates each row, geocodes every distinct address once and writes the
+# orders in UNWIND chunks. Problems are reported per row, never fatal.
+
+import asyncio
+import codecs
+import csv
+import json
+from datetime import datetime, timedelta
+from pydantic import ValidationError
+from backend.config import settings
+from backend.services.geocode_cache import MISSING
+from backend.services.geocode_client import local_geocode
+from backend.services.geocode_worker import geocode_worker
+from backend.services.analytics import analytics
+from backend.services.read_cache import customer_orders_cache
+from backend.utils.ids import new_order_id
+from backend.utils.logger import logger
+
+
+class ImportTooLarge(ValueError):
+    pass
+
+
+async def iter_lines(chunks):
+    """Decode an async stream of byte chunks into text lines as they arrive."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_ndjson(lines):
+    """Yields (row number, dict or None, error or None); blank lines are skipped."""
+    n = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield n, None, f"invalid JSON: {e}"
+            continue
+        if isinstance(data, dict):
+            yield n, data, None
+        else:
+            yield n, None, "expected a JSON object"
+
+
+async def parse_csv(lines):
+    """
+    Same as parse_ndjson for CSV with a header row. Empty cells are None.
+    A quoted field may span lines: lines are joined until quotes balance.
+    """
+    header = None
+    record = ""
+    n = 0
+    async for line in lines:
+        record = record + "\n" + line if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        n += 1
+        if len(values) != len(header):
+            yield n, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield n, {k: (v if v != "" else None) for k, v in zip(header, values)}, None
+    if record:
+        yield n + 1, None, "unterminated quoted field"
+
+
+def _validation_message(error):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def import_orders(repository, rows, schema, chunk_size=None, wait_geocode=False, max_rows=None):
+    """
+    rows: async iterator from parse_csv/parse_ndjson; schema: the pydantic
+    model each row must satisfy (OrderCreate). Addresses not resolvable
+    from the gazetteer/cache are geocoded in the background unless
+    wait_geocode. Returns a summary and a per-row report.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    max_rows = max_rows or settings.IMPORT_MAX_ROWS
+    report = {}  # row number -> entry
+    valid = []  # (row number, validated order)
+    async for n, data, error in rows:
+        if n > max_rows:
+            raise ImportTooLarge(f"imports are limited to {max_rows} rows")
+        if error is None:
+            try:
+                valid.append((n, schema(**data)))
+                continue
+            except ValidationError as e:
+                error = _validation_message(e)
+        report[n] = {"row": n, "error": error}
+
+    # Each distinct address is resolved once, however many orders share it
+    locations = {}
+    pending = []
+    for address in dict.fromkeys(order.address for _, order in valid):
+        local = local_geocode(address)
+        if local is MISSING:
+            pending.append(address)
+        else:
+            locations[address] = local
+    if wait_geocode and pending:
+        resolved = await geocode_worker.geocode_many(pending)
+        # Addresses the provider couldn't answer carry on in the background
+        pending = [address for address, result in resolved.items() if result is MISSING]
+        locations.update((address, result) for address, result in resolved.items() if result is not MISSING)
+    background = set(pending)
+
+    timestamp = datetime.now().isoformat()
+    written = []
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        records = []
+        for n, order in chunk:
+            lat, lon, city = locations.get(order.address, (None, None, None))
+            if order.address in background:
+                status = "geocoding"
+            else:
+                status = "pending" if lat is not None else "geocode_failed"
+            records.append({
+                "order_id": new_order_id(),
+                "customer": order.customer_name,
+                "issue": order.issue or "N/A",
+                "status": status,
+                "address": order.address,
+                "lat": lat,
+                "lon": lon,
+                "city": city,
+                "timestamp": timestamp,
+                "racket_id": order.racket_id,
+            })
+        try:
+            await repository.create_orders_bulk(records, chunk_size=chunk_size)
+        except Exception as e:
+            logger.error(f"Order import chunk at row {chunk[0][0]} failed: {e}")
+            for n, _ in chunk:
+                report[n] = {"row": n, "error": f"write failed: {e}"}
+            continue
+        for (n, _), record in zip(chunk, records):
+            report[n] = {"row": n, "order_id": record["order_id"], "status": record["status"]}
+            analytics.order_created(record["order_id"], record["status"], record["city"], timestamp)
+        written.extend(records)
+
+    for customer in {record["customer"] for record in written}:
+        customer_orders_cache.invalidate(customer)
+    _geocode_in_background(repository, [r for r in written if r["status"] == "geocoding"])
+
+    entries = [report[n] for n in sorted(report)]
+    return {
+        "received": len(entries),
+        "imported": len(written),
+        "failed": len(entries) - len(written),
+        "geocoding": sum(1 for r in written if r["status"] == "geocoding"),
+        "rows": entries,
+    }
+
+
+def _geocode_in_background(repository, records):
+    by_address = {}
+    for record in records:
+        by_address.setdefault(record["address"], []).append(record)
+
+    for address, group in by_address.items():
+        async def enrich(lat, lon, city, group=group):
+            status = "pending" if lat is not None else "geocode_failed"
+            await repository.set_orders_location([r["order_id"] for r in group], lat, lon, city, status)
+            for customer in {r["customer"] for r in group}:
+                customer_orders_cache.invalidate(customer)
+            for r in group:
+                analytics.order_located(r["order_id"], city, status)
+
+        geocode_worker.submit(address, enrich)
+
+
+async def resubmit_stale_geocoding(repository, age_s=None):
+    """
+    Queue again the orders still waiting for coordinates after the worker's
+    retries ran out or the process that queued them went away. Returns how
+    many orders were re-submitted.
+    """
+    age_s = age_s if age_s is not None else settings.GEOCODE_SWEEP_AGE_S
+    before = (datetime.now() - timedelta(seconds=age_s)).isoformat()
+    records = [r for r in await repository.stale_geocoding_orders(before) if r.get("address")]
+    if records:
+        logger.info(f"Re-submitting {len(records)} orders still waiting for geocoding")
+        _geocode_in_background(repository, records)
+    return len(records)
+
+
+async def run_geocode_sweeper(repository, interval_s=None):
+    interval_s = interval_s or settings.GEOCODE_SWEEP_S
+    while True:
+        try:
+            await resubmit_stale_geocoding(repository)
+        except Exception as e:
+            logger.error(f"Geocoding sweep failed: {e}")
+        await asyncio.sleep(interval_s)
@@ -0,0 +1,52 @@
+# backend/services/read_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from backend.config import settings
+
+
+class GroupedTTLCache:
+    """
+    Short-lived read-through cache for API reads. Entries are grouped (e.g.
+    by customer) so a write can drop everything cached for that group at
+    once. Expiry bounds staleness from writers in other processes.
+    """
+
+    def __init__(self, ttl_s, max_groups=10000):
+        self.ttl_s = ttl_s
+        self.max_groups = max_groups
+        self._groups = OrderedDict()  # group -> {key: (expires_at, value)}
+        self._lock = threading.Lock()
+
+    def get(self, group, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entries = self._groups.get(group)
+            entry = entries.get(key) if entries else None
+            if not entry:
+                return default
+            if entry[0] <= now:
+                del entries[key]
+                return default
+            self._groups.move_to_end(group)
+            return entry[1]
+
+    def set(self, group, key, value):
+        with self._lock:
+            self._groups.setdefault(group, {})[key] = (time.monotonic() + self.ttl_s, value)
+            self._groups.move_to_end(group)
+            while len(self._groups) > self.max_groups:
+                self._groups.popitem(last=False)
+
+    def invalidate(self, group):
+        with self._lock:
+            self._groups.pop(group, None)
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+
+
+# Pages of GET /orders/customer/{name}, grouped by customer name
+customer_orders_cache = GroupedTTLCache(settings.CUSTOMER_ORDERS_CACHE_TTL_S)
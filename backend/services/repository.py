@@ -0,0 +1,340 @@
+# backend/services/repository.py
+
+import threading
+from abc import ABC, abstractmethod
+from backend.config import settings
+from backend.services.agent_index import agent_index
+
+
+class Repository(ABC):
+    """
+    Storage operations the API depends on. Implemented by AsyncNeo4jClient
+    and by InMemoryRepository; get_repository() picks one from
+    STORAGE_BACKEND. Every method is a coroutine.
+    """
+
+    async def close(self):
+        pass
+
+    # ----- agents -----
+    @abstractmethod
+    async def create_agent(self, agent_id, name, status, lat, lon, capacity=None):
+        ...
+
+    @abstractmethod
+    async def get_agent(self, agent_id):
+        ...
+
+    @abstractmethod
+    async def get_active_agent_positions(self):
+        ...
+
+    @abstractmethod
+    async def get_active_agents_with_load(self):
+        ...
+
+    @abstractmethod
+    async def get_agent_routes(self, agent_id=None):
+        """
+        [{agent_id, name, lat, lon, orders: [{order_id, lat, lon}, ...]}] with
+        each agent's open geocoded orders; every active agent when agent_id is None.
+        """
+
+    # ----- orders -----
+    @abstractmethod
+    async def create_customer_order(self, row):
+        ...
+
+    @abstractmethod
+    async def create_orders_bulk(self, rows, chunk_size=1000):
+        ...
+
+    @abstractmethod
+    async def get_order(self, order_id):
+        ...
+
+    @abstractmethod
+    async def set_order_location(self, order_id, lat, lon, city, status):
+        ...
+
+    @abstractmethod
+    async def set_orders_location(self, order_ids, lat, lon, city, status):
+        """set_order_location for many orders sharing one address, in one write."""
+
+    @abstractmethod
+    async def stale_geocoding_orders(self, before):
+        """{order_id, customer, address} of orders still 'geocoding' with a timestamp before `before`."""
+
+    @abstractmethod
+    async def update_order_status(self, order_id, status, ts):
+        """
+        Returns {customer, timestamp, completed_at, lat, lon, agent_id,
+        agent_lat, agent_lon, agent_score}, or None if the order is unknown.
+        """
+
+    @abstractmethod
+    async def get_customer_orders(self, customer_name, limit=None, after=None):
+        """
+        A customer's orders, newest first. after: (timestamp, order_id) of
+        the last order already seen; limit: page size (None = all).
+        """
+
+    async def stream_customer_orders(self, customer_name, after=None):
+        """Async iterator over the same records as get_customer_orders, without materializing them."""
+        for record in await self.get_customer_orders(customer_name, after=after):
+            yield record
+
+    @abstractmethod
+    async def get_pending_orders(self):
+        ...
+
+    # ----- assignment -----
+    @abstractmethod
+    async def assign_order_to_agent(self, order_id, agent_id):
+        ...
+
+    @abstractmethod
+    async def assign_orders_bulk(self, assignments):
+        ...
+
+    # ----- analytics & locations -----
+    @abstractmethod
+    async def deliveries_per_agent(self):
+        ...
+
+    @abstractmethod
+    async def recent_orders(self, limit=50):
+        ...
+
+    @abstractmethod
+    async def analytics_orders(self):
+        """[{order_id, status, city, timestamp, completed_at, agent_id, agent}] for every order."""
+
+    @abstractmethod
+    async def create_location(self, name, lat, lon, address=None):
+        ...
+
+    @abstractmethod
+    async def list_locations(self):
+        ...
+
+
+class InMemoryRepository(Repository):
+    """
+    In-process stand-in for Neo4j with dict indexes on every lookup key.
+    Returns the same record shapes as the Cypher queries, for tests,
+    benchmarks and running the API without a database.
+    """
+
+    def __init__(self):
+        self.agents = {}  # agent_id -> props
+        self.orders = {}  # order_id -> props
+        self.customers = {}  # name -> [order_id, ...]
+        self.rackets = {}  # racket_id -> props
+        self.locations = {}  # name -> props
+        self.order_customer = {}  # order_id -> customer name
+        self.order_racket = {}  # order_id -> racket_id
+        self.assigned = {}  # order_id -> agent_id
+        self._lock = threading.Lock()
+
+    async def create_agent(self, agent_id, name, status, lat, lon, capacity=None):
+        with self._lock:
+            agent = self.agents.setdefault(agent_id, {"agent_id": agent_id})
+            agent.update(name=name, status=status, lat=lat, lon=lon)
+            if capacity is not None:
+                agent["capacity"] = capacity
+        agent_index.upsert(agent_id, lat, lon, status=status, name=name)
+
+    async def get_agent(self, agent_id):
+        agent = self.agents.get(agent_id)
+        return dict(agent) if agent else None
+
+    def _active_agents(self):
+        return [
+            a for a in self.agents.values()
+            if a.get("status") == "active" and a.get("lat") is not None and a.get("lon") is not None
+        ]
+
+    async def get_active_agent_positions(self):
+        return [
+            {"agent_id": a["agent_id"], "name": a.get("name"), "lat": a["lat"], "lon": a["lon"]}
+            for a in self._active_agents()
+        ]
+
+    async def get_active_agents_with_load(self):
+        load = {}
+        for order_id, agent_id in self.assigned.items():
+            order = self.orders.get(order_id)
+            if order and order.get("status") != "completed":
+                load[agent_id] = load.get(agent_id, 0) + order.get("rackets", 1)
+        return [
+            {
+                "agent_id": a["agent_id"], "name": a.get("name"), "lat": a["lat"], "lon": a["lon"],
+                "capacity": a.get("capacity"), "load": load.get(a["agent_id"], 0),
+            }
+            for a in self._active_agents()
+        ]
+
+    async def get_agent_routes(self, agent_id=None):
+        if agent_id is None:
+            agents = self._active_agents()
+        else:
+            agent = self.agents.get(agent_id)
+            agents = [agent] if agent and agent.get("lat") is not None and agent.get("lon") is not None else []
+        routes = {a["agent_id"]: [] for a in agents}
+        for order_id, assigned_to in self.assigned.items():
+            order = self.orders.get(order_id)
+            if (assigned_to in routes and order and order.get("status") != "completed"
+                    and order.get("lat") is not None and order.get("lon") is not None):
+                routes[assigned_to].append({"order_id": order_id, "lat": order["lat"], "lon": order["lon"]})
+        return [
+            {"agent_id": a["agent_id"], "name": a.get("name"), "lat": a["lat"], "lon": a["lon"],
+             "orders": routes[a["agent_id"]]}
+            for a in agents
+        ]
+
+    def _write_order(self, row):
+        order_id = row["order_id"]
+        order = self.orders.setdefault(order_id, {"order_id": order_id})
+        order.update(
+            issue=row["issue"], status=row["status"], address=row["address"], lat=row["lat"],
+            lon=row["lon"], city=row["city"], timestamp=row["timestamp"]
+        )
+        orders = self.customers.setdefault(row["customer"], [])
+        if self.order_customer.get(order_id) != row["customer"]:
+            orders.append(order_id)
+            self.order_customer[order_id] = row["customer"]
+        if row.get("racket_id") in self.rackets:
+            self.order_racket[order_id] = row["racket_id"]
+
+    async def create_customer_order(self, row):
+        with self._lock:
+            self._write_order(row)
+
+    async def create_orders_bulk(self, rows, chunk_size=1000):
+        with self._lock:
+            for row in rows:
+                self._write_order(row)
+
+    async def get_order(self, order_id):
+        order = self.orders.get(order_id)
+        return dict(order) if order else None
+
+    async def set_order_location(self, order_id, lat, lon, city, status):
+        order = self.orders.get(order_id)
+        if order:
+            order.update(lat=lat, lon=lon, city=city, status=status)
+
+    async def set_orders_location(self, order_ids, lat, lon, city, status):
+        for order_id in order_ids:
+            await self.set_order_location(order_id, lat, lon, city, status)
+
+    async def stale_geocoding_orders(self, before):
+        return [
+            {"order_id": o["order_id"], "customer": self.order_customer.get(o["order_id"]), "address": o.get("address")}
+            for o in self.orders.values()
+            if o.get("status") == "geocoding" and (o.get("timestamp") or "") < before
+        ]
+
+    async def update_order_status(self, order_id, status, ts):
+        order = self.orders.get(order_id)
+        if not order:
+            return None
+        order.update(status=status, completed_at=ts)
+        agent = self.agents.get(self.assigned.get(order_id), {})
+        return {
+            "customer": self.order_customer.get(order_id), "timestamp": order.get("timestamp"),
+            "completed_at": ts, "lat": order.get("lat"), "lon": order.get("lon"),
+            "agent_id": agent.get("agent_id"), "agent_lat": agent.get("lat"),
+            "agent_lon": agent.get("lon"), "agent_score": agent.get("score"),
+        }
+
+    async def get_customer_orders(self, customer_name, limit=None, after=None):
+        def key(order_id):
+            return (self.orders[order_id].get("timestamp") or "", order_id)
+
+        order_ids = sorted(self.customers.get(customer_name, []), key=key, reverse=True)
+        if after:
+            after = (after[0] or "", after[1])
+            order_ids = [order_id for order_id in order_ids if key(order_id) < after]
+        records = []
+        for order_id in order_ids[:limit]:
+            order = self.orders[order_id]
+            racket = self.rackets.get(self.order_racket.get(order_id), {})
+            records.append({
+                "order_id": order_id, "status": order.get("status"), "issue": order.get("issue"),
+                "address": order.get("address"), "city": order.get("city"),
+                "timestamp": order.get("timestamp"), "racket_brand": racket.get("brand"),
+                "racket_type": racket.get("type"),
+            })
+        return records
+
+    async def get_pending_orders(self):
+        return [
+            {"order_id": o["order_id"], "lat": o["lat"], "lon": o["lon"], "rackets": o.get("rackets", 1)}
+            for o in self.orders.values()
+            if o.get("status") == "pending" and o.get("lat") is not None
+            and o.get("lon") is not None and o["order_id"] not in self.assigned
+        ]
+
+    async def assign_order_to_agent(self, order_id, agent_id):
+        if order_id in self.orders and agent_id in self.agents:
+            self.assigned[order_id] = agent_id
+
+    async def assign_orders_bulk(self, assignments):
+        with self._lock:
+            for row in assignments:
+                if row["order_id"] in self.orders and row["agent_id"] in self.agents:
+                    self.assigned[row["order_id"]] = row["agent_id"]
+
+    async def deliveries_per_agent(self):
+        counts = {}
+        for agent_id in self.assigned.values():
+            counts[agent_id] = counts.get(agent_id, 0) + 1
+        return [
+            {"agent": self.agents[agent_id].get("name"), "deliveries": n}
+            for agent_id, n in counts.items()
+        ]
+
+    async def recent_orders(self, limit=50):
+        orders = sorted(self.orders.values(), key=lambda o: o.get("timestamp") or "", reverse=True)
+        return [
+            {
+                "order_id": o["order_id"], "status": o.get("status"), "issue": o.get("issue"),
+                "address": o.get("address"), "lat": o.get("lat"), "lon": o.get("lon"),
+                "agent": self.agents.get(self.assigned.get(o["order_id"]), {}).get("name"),
+            }
+            for o in orders[:limit]
+        ]
+
+    async def analytics_orders(self):
+        return [
+            {
+                "order_id": o["order_id"], "status": o.get("status"), "city": o.get("city"),
+                "timestamp": o.get("timestamp"), "completed_at": o.get("completed_at"),
+                "agent_id": self.assigned.get(o["order_id"]),
+                "agent": self.agents.get(self.assigned.get(o["order_id"]), {}).get("name"),
+            }
+            for o in self.orders.values()
+        ]
+
+    async def create_location(self, name, lat, lon, address=None):
+        self.locations[name] = {"name": name, "lat": lat, "lon": lon, "address": address}
+
+    async def list_locations(self):
+        return [dict(l) for l in self.locations.values()]
+
+
+_repository = None
+
+
+def get_repository():
+    """Process-wide repository selected by STORAGE_BACKEND ("neo4j" or "memory")."""
+    global _repository
+    if _repository is None:
+        if settings.STORAGE_BACKEND == "memory":
+            _repository = InMemoryRepository()
+        else:
+            from backend.services.neo4j_client import get_async_neo4j_client
+            _repository = get_async_neo4j_client()
+    return _repository
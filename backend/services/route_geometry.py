@@ -0,0 +1,129 @@
+# backend/services/route_geometry.py
+# Per-agent route geometry for GET /routes: stop order from the incremental
+# route planner, encoded as a polyline with per-leg distance and ETA.
+# Cached per agent and keyed on the planner's route version plus a
+# fingerprint of the agent's open orders in the repository, so planner
+# changes and writes made straight to the repository both invalidate it.
+
+import asyncio
+import threading
+import time
+from backend.config import settings
+from backend.services.distance_matrix import leg_distances_km
+from backend.services.optimizer import optimizer
+from backend.services.route_planner import route_planner
+from backend.utils.logger import logger
+from backend.utils.polyline import encode_polyline
+
+
+class RouteGeometryCache:
+    def __init__(self, ttl_s):
+        self.ttl_s = ttl_s
+        self._entries = {}  # agent_id -> (key, expires_at, payload)
+        self._lock = threading.Lock()
+
+    def get(self, agent_id, key):
+        with self._lock:
+            entry = self._entries.get(agent_id)
+        if entry and entry[0] == key and entry[1] > time.monotonic():
+            return entry[2]
+        return None
+
+    def set(self, agent_id, key, payload):
+        with self._lock:
+            self._entries[agent_id] = (key, time.monotonic() + self.ttl_s, payload)
+
+    def invalidate(self, agent_id=None):
+        with self._lock:
+            if agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent_id, None)
+
+
+route_cache = RouteGeometryCache(settings.ROUTE_CACHE_TTL_S)
+
+
+def _cache_key(row):
+    """Planner version plus the agent's position and open orders as the repository has them."""
+    orders = tuple(sorted((str(o["order_id"]), o["lat"], o["lon"]) for o in row["orders"]))
+    return route_planner.version(row["agent_id"]), row["lat"], row["lon"], orders
+
+
+def _sync_planner(row):
+    """
+    Make the planner hold exactly the repository's open orders for this
+    agent, solving the visiting order with OR-Tools when it does not.
+    """
+    agent_id, orders = row["agent_id"], row["orders"]
+    if route_planner.has_agent(agent_id) and set(route_planner.get_route(agent_id)) == {o["order_id"] for o in orders}:
+        return
+    points = [(row["lat"], row["lon"])] + [(o["lat"], o["lon"]) for o in orders]
+    try:
+        order = optimizer.compute_shortest_route(points)
+    except Exception as e:
+        logger.error(f"Route solve for agent {agent_id} failed: {e}")
+        order = None
+    if not order or sorted(order) != list(range(len(points))):
+        # Never drop stops: keep the repository's order if the solve didn't visit them all
+        order = list(range(len(points)))
+    stops = [(orders[i - 1]["order_id"], orders[i - 1]["lat"], orders[i - 1]["lon"]) for i in order if i]
+    route_planner.set_agent(agent_id, row["lat"], row["lon"], stops)
+
+
+def _build(row):
+    from backend.utils.helpers import route_etas
+    _sync_planner(row)
+    _, start, stops = route_planner.snapshot(row["agent_id"])
+    points = [start] + [(lat, lon) for _, lat, lon in stops]
+    distances = leg_distances_km(points).tolist() if stops else []
+    etas = route_etas(points) if stops else []
+
+    legs = []
+    arrival = 0.0
+    previous = None
+    for (order_id, _, _), distance, eta in zip(stops, distances, etas):
+        arrival += eta
+        legs.append({
+            "from_order_id": previous, "to_order_id": order_id,
+            "distance_km": round(distance, 3), "eta_minutes": round(eta, 1),
+            "arrival_minutes": round(arrival, 1),
+        })
+        previous = order_id
+
+    payload = {
+        "agent_id": row["agent_id"],
+        "name": row.get("name"),
+        "start": {"lat": start[0], "lon": start[1]},
+        "stops": [{"order_id": order_id, "lat": lat, "lon": lon} for order_id, lat, lon in stops],
+        "polyline": encode_polyline(points),
+        "legs": legs,
+        "distance_km": round(sum(distances), 3),
+        "eta_minutes": round(arrival, 1),
+    }
+    route_cache.set(row["agent_id"], _cache_key(row), payload)
+    return payload
+
+
+async def _route(row):
+    cached = route_cache.get(row["agent_id"], _cache_key(row))
+    if cached is not None:
+        return cached
+    # OR-Tools and the model run off the event loop
+    return await asyncio.to_thread(_build, row)
+
+
+async def get_agent_route(repository, agent_id):
+    """
+    Route payload for one agent, or None if the agent is unknown or has no position.
+    The agent's orders are always read; only the solve and ETAs are cached.
+    """
+    rows = await repository.get_agent_routes(agent_id)
+    if not rows:
+        return None
+    return await _route(rows[0])
+
+
+async def get_all_routes(repository):
+    """Route payloads for every active agent; only stale agents are rebuilt."""
+    return [await _route(row) for row in await repository.get_agent_routes()]
@@ -0,0 +1,181 @@
+# backend/services/route_planner.py
+
+import threading
+import numpy as np
+from backend.config import settings
+from backend.services.distance_matrix import cost_matrix
+from backend.services.optimizer import optimizer
+
+
+class AgentRoute:
+    """
+    One agent's open route plus the cost matrix rows for its stops.
+    Node 0 is the agent's start; nodes 1..size-1 are stops in insertion order.
+    """
+
+    def __init__(self, agent_id, lat, lon, capacity=16):
+        self.agent_id = agent_id
+        self.points = np.zeros((capacity, 2))
+        self.cost = np.zeros((capacity, capacity), dtype=np.int32)
+        self.points[0] = (lat, lon)
+        self.size = 1
+        self.order_ids = [None]  # node -> order_id
+        self.route = []  # visiting order of nodes, start excluded
+        self.inserts_since_solve = 0
+
+    def _grow(self):
+        capacity = self.points.shape[0] * 2
+        points = np.zeros((capacity, 2))
+        points[:self.size] = self.points[:self.size]
+        cost = np.zeros((capacity, capacity), dtype=np.int32)
+        cost[:self.size, :self.size] = self.cost[:self.size, :self.size]
+        self.points, self.cost = points, cost
+
+    def add_node(self, order_id, lat, lon):
+        """Append a node and fill its matrix row/column in O(n)."""
+        if self.size == self.points.shape[0]:
+            self._grow()
+        node = self.size
+        self.points[node] = (lat, lon)
+        row = cost_matrix([(lat, lon)], self.points[:node + 1])[0]
+        self.cost[node, :node + 1] = row
+        self.cost[:node + 1, node] = row
+        self.order_ids.append(order_id)
+        self.size += 1
+        return node
+
+    def remove_node(self, node):
+        keep = [i for i in range(self.size) if i != node]
+        self.points[:self.size - 1] = self.points[keep]
+        self.cost[:self.size - 1, :self.size - 1] = self.cost[np.ix_(keep, keep)]
+        del self.order_ids[node]
+        self.size -= 1
+        self.route = [i if i < node else i - 1 for i in self.route if i != node]
+
+    def cheapest_insertion(self, node):
+        """
+        Position and added cost of the cheapest place to visit `node`.
+        Every gap is evaluated with one vectorized pass over the route.
+        """
+        prev = np.array([0] + self.route)
+        if not self.route:
+            return 0, int(self.cost[0, node])
+        nxt = np.array(self.route)
+        middle = (
+            self.cost[prev[:-1], node].astype(np.int64)
+            + self.cost[node, nxt]
+            - self.cost[prev[:-1], nxt]
+        )
+        deltas = np.append(middle, self.cost[prev[-1], node])
+        position = int(np.argmin(deltas))
+        return position, int(deltas[position])
+
+    def stops(self):
+        return [self.order_ids[node] for node in self.route]
+
+
+class IncrementalRouter:
+    """
+    Keeps every agent's current route in memory and inserts new stops at
+    their cheapest position, handing the route to OR-Tools as a warm start
+    every `reoptimize_every` insertions.
+    """
+
+    def __init__(self, reoptimize_every=None, time_limit_s=None):
+        self.reoptimize_every = reoptimize_every or settings.ROUTE_REOPTIMIZE_EVERY
+        self.time_limit_s = time_limit_s or settings.ROUTE_REOPTIMIZE_TIME_LIMIT_S
+        self._routes = {}
+        self._order_agent = {}
+        self._versions = {}  # agent_id -> change counter, for caches built on a route
+        self._lock = threading.Lock()
+
+    def _changed(self, agent_id):
+        self._versions[agent_id] = self._versions.get(agent_id, 0) + 1
+
+    def set_agent(self, agent_id, lat, lon, stops=()):
+        """
+        (Re)load an agent's route. stops: [(order_id, lat, lon), ...] in visiting order.
+        """
+        with self._lock:
+            old = self._routes.get(agent_id)
+            if old:
+                for order_id in old.order_ids[1:]:
+                    self._order_agent.pop(order_id, None)
+            agent_route = AgentRoute(agent_id, lat, lon)
+            for order_id, stop_lat, stop_lon in stops:
+                agent_route.route.append(agent_route.add_node(order_id, stop_lat, stop_lon))
+                self._order_agent[order_id] = agent_id
+            self._routes[agent_id] = agent_route
+            self._changed(agent_id)
+
+    def has_agent(self, agent_id):
+        return agent_id in self._routes
+
+    def insert_order(self, agent_id, order_id, lat, lon):
+        """
+        Insert a stop into an agent's route, first dropping it from whichever
+        route held it before, so a re-assigned order is never visited twice.
+        returns: (position in route, added cost in metres)
+        """
+        with self._lock:
+            self._remove(order_id)
+            agent_route = self._routes[agent_id]
+            node = agent_route.add_node(order_id, lat, lon)
+            position, added = agent_route.cheapest_insertion(node)
+            agent_route.route.insert(position, node)
+            self._order_agent[order_id] = agent_id
+            agent_route.inserts_since_solve += 1
+            if agent_route.inserts_since_solve >= self.reoptimize_every:
+                self._reoptimize(agent_route)
+            self._changed(agent_id)
+            return position, added
+
+    def remove_order(self, order_id):
+        with self._lock:
+            self._remove(order_id)
+
+    def _remove(self, order_id):
+        agent_id = self._order_agent.pop(order_id, None)
+        if agent_id is None:
+            return
+        agent_route = self._routes[agent_id]
+        agent_route.remove_node(agent_route.order_ids.index(order_id))
+        self._changed(agent_id)
+
+    def reoptimize(self, agent_id):
+        with self._lock:
+            self._reoptimize(self._routes[agent_id])
+
+    def _reoptimize(self, agent_route):
+        cost = agent_route.cost[:agent_route.size, :agent_route.size].tolist()
+        agent_route.route = optimizer.improve_route(cost, agent_route.route, self.time_limit_s)
+        agent_route.inserts_since_solve = 0
+        self._changed(agent_route.agent_id)
+
+    def get_route(self, agent_id):
+        with self._lock:
+            agent_route = self._routes.get(agent_id)
+            return agent_route.stops() if agent_route else []
+
+    def version(self, agent_id):
+        """Changes whenever the agent's route does; None for an unknown agent."""
+        return self._versions.get(agent_id)
+
+    def snapshot(self, agent_id):
+        """
+        (version, (start lat, lon), [(order_id, lat, lon), ...] in visiting
+        order), or None for an unknown agent.
+        """
+        with self._lock:
+            agent_route = self._routes.get(agent_id)
+            if not agent_route:
+                return None
+            start = tuple(agent_route.points[0].tolist())
+            stops = [
+                (agent_route.order_ids[node], *agent_route.points[node].tolist())
+                for node in agent_route.route
+            ]
+            return self._versions.get(agent_id), start, stops
+
+
+route_planner = IncrementalRouter()
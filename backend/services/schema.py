@@ -0,0 +1,123 @@
+# backend/services/schema.py
+# Schema bootstrap: uniqueness constraints and indexes for every key the
+# application MATCHes or MERGEs on. Runs at API startup, or by hand with
+# `python -m backend.services.schema` (--check only scans the code for
+# Cypher patterns that no index covers).
+
+import asyncio
+import os
+import re
+import sys
+from backend.utils.logger import logger
+
+# name -> statement; every statement is idempotent
+CONSTRAINTS = {
+    "agent_id_unique": "CREATE CONSTRAINT agent_id_unique IF NOT EXISTS FOR (a:Agent) REQUIRE a.agent_id IS UNIQUE",
+    "order_id_unique": "CREATE CONSTRAINT order_id_unique IF NOT EXISTS FOR (o:Order) REQUIRE o.order_id IS UNIQUE",
+    "racket_id_unique": "CREATE CONSTRAINT racket_id_unique IF NOT EXISTS FOR (r:Racket) REQUIRE r.racket_id IS UNIQUE",
+    "customer_id_unique": "CREATE CONSTRAINT customer_id_unique IF NOT EXISTS FOR (c:Customer) REQUIRE c.customer_id IS UNIQUE",
+}
+
+INDEXES = {
+    "customer_name": "CREATE INDEX customer_name IF NOT EXISTS FOR (c:Customer) ON (c.name)",
+    "agent_status": "CREATE INDEX agent_status IF NOT EXISTS FOR (a:Agent) ON (a.status)",
+    "order_status": "CREATE INDEX order_status IF NOT EXISTS FOR (o:Order) ON (o.status)",
+    "order_timestamp": "CREATE INDEX order_timestamp IF NOT EXISTS FOR (o:Order) ON (o.timestamp)",
+    "location_address": "CREATE INDEX location_address IF NOT EXISTS FOR (l:Location) ON (l.address)",
+    "location_name": "CREATE INDEX location_name IF NOT EXISTS FOR (l:Location) ON (l.name)",
+    "location_point": "CREATE POINT INDEX location_point IF NOT EXISTS FOR (l:Location) ON (l.point)",
+    "agent_point": "CREATE POINT INDEX agent_point IF NOT EXISTS FOR (a:Agent) ON (a.point)",
+}
+
+# Fill `point` on nodes written before the point indexes existed
+BACKFILLS = [
+    "MATCH (l:Location) WHERE l.point IS NULL AND l.lat IS NOT NULL AND l.lon IS NOT NULL "
+    "SET l.point = point({latitude:l.lat, longitude:l.lon})",
+    "MATCH (a:Agent) WHERE a.point IS NULL AND a.lat IS NOT NULL AND a.lon IS NOT NULL "
+    "SET a.point = point({latitude:a.lat, longitude:a.lon})",
+]
+
+# (label, property) pairs covered by the definitions above
+INDEXED_KEYS = {
+    (m.group(1), m.group(2))
+    for statement in list(CONSTRAINTS.values()) + list(INDEXES.values())
+    for m in [re.search(r"FOR \(\w+:(\w+)\) (?:REQUIRE|ON) \(?\w+\.(\w+)", statement)]
+}
+
+
+async def apply_schema(client):
+    """
+    Create any missing constraints/indexes and backfill point properties.
+    client: AsyncNeo4jClient. Returns the names that were newly created.
+    """
+    existing = {r["name"] for r in await client.read("SHOW CONSTRAINTS YIELD name RETURN name")}
+    existing |= {r["name"] for r in await client.read("SHOW INDEXES YIELD name RETURN name")}
+
+    created = []
+    for name, statement in list(CONSTRAINTS.items()) + list(INDEXES.items()):
+        if name in existing:
+            continue
+        try:
+            await client.write(statement)
+            created.append(name)
+        except Exception as e:
+            # e.g. duplicate keys already in the graph block a uniqueness constraint
+            logger.error(f"Schema: could not create {name}: {e}")
+    for statement in BACKFILLS:
+        await client.write(statement)
+
+    if created:
+        logger.info(f"Schema: created {', '.join(created)}")
+    else:
+        logger.info("Schema: all constraints and indexes already present")
+    return created
+
+
+# --------------------------
+# Static check for unindexed Cypher
+# --------------------------
+NODE_KEY_RE = re.compile(r"\(\w*:(\w+)\s*\{(\w+)\s*:")
+LABEL_SCAN_RE = re.compile(r"MATCH\s*\(\w*:(\w+)\)")
+
+
+def find_unindexed_cypher(root):
+    """
+    Scan .py files under root for Cypher node patterns. Reports
+    (path, line, message) for property lookups no index covers and for
+    MATCHes on a bare label, which scan every node with that label.
+    """
+    findings = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith((".", "__"))]
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if not filename.endswith(".py") or os.path.samefile(path, __file__):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for lineno, line in enumerate(f, 1):
+                    for label, prop in NODE_KEY_RE.findall(line):
+                        if (label, prop) not in INDEXED_KEYS:
+                            findings.append((path, lineno, f"no index on :{label}({prop})"))
+                    for label in LABEL_SCAN_RE.findall(line):
+                        findings.append((path, lineno, f"label scan on :{label}"))
+    return findings
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if "--check" in sys.argv:
+        results = find_unindexed_cypher(root)
+        for path, lineno, message in results:
+            print(f"{os.path.relpath(path, root)}:{lineno}: {message}")
+        sys.exit(1 if any("no index" in m for _, _, m in results) else 0)
+
+    from backend.services.neo4j_client import get_async_neo4j_client
+
+    async def main():
+        client = get_async_neo4j_client()
+        try:
+            print(await apply_schema(client))
+        finally:
+            await client.close()
+
+    asyncio.run(main())
@@ -1,20 +1,22 @@
-from twilio.rest import Client
-from backend.config import settings
-from backend.utils.logger import logger
+from functools import lru_cache
+from backend.services.notification_dispatcher import notification_dispatcher
 
 class TwilioNotifier:
-    def __init__(self):
-        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+    def __init__(self, dispatcher=None):
+        self.dispatcher = dispatcher or notification_dispatcher
 
     def send_message(self, to, body):
-        try:
-            message = self.client.messages.create(
-                body=body,
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=to
-            )
-            logger.info(f"Message sent to {to}: {message.sid}")
-        except Exception as e:
-            logger.error(f"Twilio error: {e}")
+        """
+        Queue an SMS and return its outbox id at once; the notification
+        dispatcher sends it in the background with retries.
+        """
+        return self.dispatcher.enqueue(to, body)
 
-notifier = TwilioNotifier()
+@lru_cache(maxsize=None)
+def get_notifier():
+    return TwilioNotifier()
+
+def __getattr__(name):
+    if name == "notifier":
+        return get_notifier()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,11 @@
 # D:\badminton_agent_1\backend\utils\helpers.py
 
-from math import radians, cos, sin, sqrt, atan2
-from backend.services.neo4j_client import neo4j_client
+from backend.services.distance_matrix import haversine_km, leg_distances_km, DEFAULT_SPEED_KMH
+from backend.config import settings
+from backend.services.agent_index import agent_index
+from backend.services.neo4j_client import get_neo4j_client, POINT, UPDATE_ORDER_STATUS
 from backend.services.geocode_client import geocode_address
+from backend.services.route_planner import route_planner
 from datetime import datetime, timedelta
 
 
@@ -12,14 +15,9 @@ from datetime import datetime, timedelta
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate distance in kilometers between two coordinates using Haversine formula.
+    Shares its implementation with the optimizer's distance matrix.
     """
-    R = 6371  # Radius of Earth in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
-    return distance
+    return float(haversine_km(lat1, lon1, lat2, lon2))
 
 
 # --------------------------
@@ -29,40 +27,35 @@ def assign_agent_to_order(order_id, order_lat, order_lon):
     """
     Assign nearest active agent to a new order based on coordinates.
     """
-    with neo4j_client.driver.session() as session:
-        # Get all active agents with location
-        result = session.run(
-            "MATCH (a:Agent {status:'active'})-[:LOCATED_AT]->(l:Location) "
-            "RETURN a.agent_id AS agent_id, a.name AS name, l.lat AS lat, l.lon AS lon"
-        )
-        agents = result.data()
-        if not agents:
-            return None, "No active agents available"
-
-        # Find nearest agent
-        nearest = None
-        min_distance = float('inf')
-        for agent in agents:
-            dist = calculate_distance(order_lat, order_lon, agent['lat'], agent['lon'])
-            if dist < min_distance:
-                min_distance = dist
-                nearest = agent
-
-        # Assign agent
-        if nearest:
-            session.run(
-                "MATCH (o:Order {order_id:$order_id}), (a:Agent {agent_id:$agent_id}) "
-                "MERGE (a)-[:ASSIGNED_TO]->(o)",
-                order_id=order_id, agent_id=nearest['agent_id']
-            )
-            return nearest['name'], min_distance
+    if agent_index.is_stale(settings.AGENT_INDEX_REFRESH_S):
+        agent_index.load(get_neo4j_client().get_active_agent_positions())
+    if not len(agent_index):
+        return None, "No active agents available"
+
+    # Find nearest agent
+    matches = agent_index.nearest(order_lat, order_lon, k=1, max_km=settings.ASSIGN_MAX_KM)
+    if not matches:
         return None, None
+    nearest = matches[0]
+
+    # Assign agent
+    with get_neo4j_client().driver.session() as session:
+        session.run(
+            "MATCH (o:Order {order_id:$order_id}), (a:Agent {agent_id:$agent_id}) "
+            "MERGE (a)-[:ASSIGNED_TO]->(o)",
+            order_id=order_id, agent_id=nearest['agent_id']
+        )
+    # Keep the agent's in-memory route current without a full re-solve
+    if not route_planner.has_agent(nearest['agent_id']):
+        route_planner.set_agent(nearest['agent_id'], nearest['lat'], nearest['lon'])
+    route_planner.insert_order(nearest['agent_id'], order_id, order_lat, order_lon)
+    return nearest['name'], nearest['distance_km']
 
 
 # --------------------------
 # ETA Calculation (simple)
 # --------------------------
-def estimate_eta(distance_km, speed_kmh=30):
+def estimate_eta(distance_km, speed_kmh=DEFAULT_SPEED_KMH):
     """
     Estimate ETA in minutes given distance in km and average speed in km/h.
     """
@@ -73,6 +66,20 @@ def estimate_eta(distance_km, speed_kmh=30):
     return eta_minutes
 
 
+def route_etas(points, traffic_level=1.0, agent_score=1.0):
+    """
+    Per-leg ETAs in minutes for a route given as [(lat, lon), ...] from the
+    agent's start, predicted for all legs in one batched model call.
+    """
+    from backend.services.ml_predictor import get_ml_predictor
+    legs = leg_distances_km(points)
+    return get_ml_predictor().predict_route({
+        "distance_km": legs,
+        "traffic_level": [traffic_level] * len(legs),
+        "agent_score": [agent_score] * len(legs),
+    })
+
+
 # --------------------------
 # Create or get Location node
 # --------------------------
@@ -86,10 +93,10 @@ def get_or_create_location(address):
         print(f"Error geocoding address {address}: {e}")
         return None, None
 
-    with neo4j_client.driver.session() as session:
+    with get_neo4j_client().driver.session() as session:
         session.run(
             "MERGE (l:Location {address:$address}) "
-            "SET l.lat=$lat, l.lon=$lon",
+            "SET l.lat=$lat, l.lon=$lon, l.point=" + POINT,
             address=address, lat=lat, lon=lon
         )
     return lat, lon
@@ -102,13 +109,22 @@ def update_order_status(order_id, status="completed"):
     """
     Update order status and completed timestamp.
     """
-    with neo4j_client.driver.session() as session:
+    with get_neo4j_client().driver.session() as session:
         ts = datetime.now().isoformat()
-        session.run(
-            "MATCH (o:Order {order_id:$order_id}) "
-            "SET o.status=$status, o.completed_at=$ts",
+        record = session.run(
+            UPDATE_ORDER_STATUS,
             order_id=order_id, status=status, ts=ts
-        )
+        ).single()
+    if record:
+        # Only clears this process's cache; API workers expire theirs by TTL
+        from backend.services.read_cache import customer_orders_cache
+        customer_orders_cache.invalidate(record["customer"])
+    if status == "completed":
+        route_planner.remove_order(order_id)
+        if record:
+            # Completed orders are labelled ETA training samples
+            from backend.services.eta_trainer import eta_trainer
+            eta_trainer.record_completion(record.data())
 
 
 # --------------------------
@@ -118,7 +134,7 @@ def fetch_orders_with_agents():
     """
     Return list of orders with assigned agent and delivery coordinates.
     """
-    with neo4j_client.driver.session() as session:
+    with get_neo4j_client().driver.session() as session:
         result = session.run(
             "MATCH (o:Order)-[:DELIVERED_TO]->(l:Location) "
             "OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o) "
@@ -0,0 +1,29 @@
+import threading
+import time
+
+_lock = threading.Lock()
+_last = 0
+
+
+def new_order_id():
+    """
+    Unique, time-ordered integer order id: microseconds since the epoch,
+    bumped when several orders are created in the same microsecond.
+    Stays below 2**53, so it survives JSON round trips through JavaScript.
+    """
+    global _last
+    with _lock:
+        _last = max(time.time_ns() // 1000, _last + 1)
+        return _last
+
+
+def order_id_forms(order_id):
+    """
+    Ids an order from a URL path may be stored under, most likely first.
+    API-created orders have integer ids; orders entered on the registration
+    page keep the string that was typed, which may also look numeric.
+    """
+    order_id = str(order_id).strip()
+    if order_id.lstrip("-").isdigit():
+        return [int(order_id), order_id]
+    return [order_id]
@@ -0,0 +1,251 @@
+# backend/utils/metrics.py
+# In-process metrics in the Prometheus text format, plus an opt-in sampling
+# profiler. Nothing here talks to the network: /metrics renders the registry
+# on demand, and profiles are written as collapsed stacks (one
+# "frame;frame;frame count" line per stack) that flamegraph.pl or
+# speedscope can open.
+
+import asyncio
+import bisect
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from backend.config import settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, series in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (bound,))} {cumulative}"
+                    )
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ----- metrics recorded across the app -----
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "API request latency by route template", ("method", "route", "status")
+)
+span_latency = registry.histogram(
+    "span_duration_seconds", "Duration of instrumented operations", ("span", "name", "outcome")
+)
+geocode_lookups = registry.counter("geocode_lookups_total", "Geocode lookups by source", ("kind", "result"))
+solve_nodes = registry.histogram(
+    "ortools_solve_nodes", "Nodes in OR-Tools models", ("kind",), buckets=(2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+)
+solve_objective = registry.gauge("ortools_last_objective", "Objective of the latest OR-Tools solution", ("kind",))
+
+
+@contextmanager
+def span(kind, name=""):
+    """
+    Time the enclosed block into span_duration_seconds{span=kind, name=name}.
+    The outcome label is "error" if the block raised, otherwise "ok".
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        span_latency.observe(time.perf_counter() - start, span=kind, name=name, outcome=outcome)
+
+
+def record_solve(kind, nodes, objective=None):
+    solve_nodes.observe(nodes, kind=kind)
+    if objective is not None:
+        solve_objective.set(objective, kind=kind)
+
+
+# --------------------------
+# Sampling profiler
+# --------------------------
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval_s` on a background
+    thread and counts identical stacks. Requests share the event loop
+    thread, so concurrent requests show up in each other's profiles.
+    """
+
+    def __init__(self, thread_id, interval_s):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def should_profile(request_header=None):
+    """Profile when PROFILE_SAMPLE_RATE picks this request, or when it sends X-Profile: 1."""
+    if not settings.PROFILE_DIR:
+        return False
+    if request_header == "1":
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def write_profile(route, stacks):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    path = os.path.join(settings.PROFILE_DIR, f"{slug}-{time.time_ns()}.folded")
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+def _finish_profile(sampler, route):
+    return write_profile(route, sampler.stop())
+
+
+def install(app):
+    """Add the request-timing/profiling middleware and GET /metrics to a FastAPI app."""
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def metrics_middleware(request, call_next):
+        sampler = None
+        if should_profile(request.headers.get("x-profile")):
+            sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL_S).start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route template, not the raw path, to keep label cardinality bounded
+            route = request.scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            http_latency.observe(time.perf_counter() - start, method=request.method, route=route, status=status)
+            if sampler:
+                # Joining the sampler thread and writing the file both block
+                await asyncio.to_thread(_finish_profile, sampler, f"{request.method} {route}")
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,40 @@
+# Google encoded polyline format: compact route geometry for the API/UI.
+
+def encode_polyline(points, precision=5):
+    """points: [(lat, lon), ...] -> encoded polyline string."""
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        lat, lon = round(lat * factor), round(lon * factor)
+        for delta in (lat - prev_lat, lon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lon = lat, lon
+    return "".join(out)
+
+
+def decode_polyline(encoded, precision=5):
+    """Inverse of encode_polyline: [(lat, lon), ...]."""
+    factor = 10 ** precision
+    points = []
+    index = lat = lon = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
@@ -0,0 +1,79 @@
+# benchmarks/common.py
+# Timing, summary statistics and the result file format shared by the
+# micro-benchmarks and the load generator.
+
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(0, min(len(sorted_samples) - 1, math.ceil(q * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples_s, elapsed_s=None, errors=0):
+    """
+    Latency summary in milliseconds. elapsed_s: wall time the samples were
+    collected over, for throughput (defaults to their sum, i.e. serial runs).
+    """
+    ordered = sorted(samples_s)
+    elapsed_s = elapsed_s if elapsed_s is not None else sum(ordered)
+    ms = lambda s: round(s * 1000, 3) if s is not None else None
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+        "throughput_per_s": round(len(ordered) / elapsed_s, 2) if elapsed_s else None,
+    }
+
+
+def time_calls(fn, runs, warmup=1):
+    """Call fn() warmup + runs times; returns the timed samples in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, kind, results, config=None):
+    """Write {"meta": ..., "config": ..., "results": {name: summary}} as JSON."""
+    document = {
+        "meta": {
+            "kind": kind,
+            "created_at": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "config": config or {},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return document
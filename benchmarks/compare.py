@@ -0,0 +1,52 @@
+# benchmarks/compare.py
+# Compare two result files from benchmarks.micro or benchmarks.load:
+#
+#   python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+#
+# Exits 1 if any p95 regressed by more than the threshold (percent).
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s")
+
+
+def compare(baseline, candidate):
+    """{name: {metric: (old, new, change %)}} for results present in both files."""
+    rows = {}
+    for name, new in candidate["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        rows[name] = {}
+        for metric in METRICS:
+            a, b = old.get(metric), new.get(metric)
+            change = round((b - a) / a * 100, 1) if a and b is not None else None
+            rows[name][metric] = (a, b, change)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressed = []
+    print(f"{'benchmark':32} {'metric':18} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name, metrics in compare(baseline, candidate).items():
+        for metric, (a, b, change) in metrics.items():
+            print(f"{name:32} {metric:18} {a!s:>12} {b!s:>12} {'' if change is None else f'{change:+.1f}%':>9}")
+        change = metrics["p95_ms"][2]
+        if change is not None and change > args.threshold:
+            regressed.append(name)
+    if regressed:
+        print(f"p95 regressed more than {args.threshold}%: {', '.join(regressed)}")
+        sys.exit(1)
@@ -0,0 +1,93 @@
+# benchmarks/fakes.py
+# Local stand-ins for every external service, so the API can be driven
+# in-process with no network: the in-memory repository instead of Neo4j,
+# a deterministic geocoder instead of Nominatim, the recording fake SMS
+# transport instead of Twilio and a nearest-agent picker instead of the LLM.
+# install_fakes() must run before anything imports backend.config.
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import types
+
+
+class FakeGeocoder:
+    """
+    Deterministic coordinates around Bengaluru derived from the address.
+    Addresses already looked up behave like cache hits; new ones cost
+    latency_s, like a network lookup.
+    """
+
+    def __init__(self, latency_s=0.0, center=(12.97, 77.59), spread_deg=0.15):
+        self.latency_s = latency_s
+        self.center = center
+        self.spread_deg = spread_deg
+        self.seen = set()
+        self.lookups = 0
+
+    def locate(self, address):
+        digest = hashlib.blake2b(address.lower().encode(), digest_size=8).digest()
+        a = int.from_bytes(digest[:4], "big") / 2**32 - 0.5
+        b = int.from_bytes(digest[4:], "big") / 2**32 - 0.5
+        return self.center[0] + a * self.spread_deg, self.center[1] + b * self.spread_deg, "Bengaluru"
+
+    def geocode_address(self, address):
+        self.lookups += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        self.seen.add(address)
+        return self.locate(address)
+
+    def local_geocode(self, address):
+        from backend.services.geocode_cache import MISSING
+        return self.locate(address) if address in self.seen else MISSING
+
+
+class FakeLLMClient:
+    """Stands in for backend.services.llm_agent: assigns the nearest active agent."""
+
+    def assign_agent(self, order):
+        from backend.services.agent_index import agent_index
+        if order.get("lat") is None or order.get("lon") is None:
+            return None
+        nearest = agent_index.nearest(order["lat"], order["lon"], k=1)
+        return nearest[0]["agent_id"] if nearest else None
+
+    def chat(self, message):
+        return f"echo: {message}"
+
+
+def install_fakes(geocode_latency_s=0.0, workdir=None):
+    """
+    Point the backend at local fakes and throwaway state under workdir.
+    Returns {"geocoder": FakeGeocoder, "transport": FakeTransport, "workdir": path}.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="bench-")
+    os.environ.update({
+        "STORAGE_BACKEND": "memory",
+        "NOTIFY_TRANSPORT": "fake",
+        "NOTIFY_OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite"),
+        "GEOCODE_CACHE_PATH": os.path.join(workdir, "geocode.sqlite"),
+        "GEOCODE_RATE_PER_S": "100000",
+        "MODEL_DIR": os.path.join(workdir, "models"),
+        "GEOCODER_BACKEND": "online",
+    })
+    if "backend.config" in sys.modules:
+        raise RuntimeError("install_fakes() must run before backend modules are imported")
+
+    geocoder = FakeGeocoder(latency_s=geocode_latency_s)
+    from backend.services import geocode_client, geocode_worker
+    geocode_client.geocode_address = geocoder.geocode_address
+    geocode_client.lookup_address = geocoder.geocode_address
+    geocode_client.local_geocode = geocoder.local_geocode
+    geocode_worker.lookup_address = geocoder.geocode_address
+    geocode_worker.local_geocode = geocoder.local_geocode
+
+    llm_agent = types.ModuleType("backend.services.llm_agent")
+    llm_agent.llm_client = FakeLLMClient()
+    sys.modules["backend.services.llm_agent"] = llm_agent
+
+    from backend.services.notification_dispatcher import notification_dispatcher
+    return {"geocoder": geocoder, "transport": notification_dispatcher.transport, "workdir": workdir}
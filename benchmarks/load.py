@@ -0,0 +1,131 @@
+# benchmarks/load.py
+# In-process load generator: drives the FastAPI app through httpx's ASGI
+# transport with concurrent virtual users against local fakes, and reports
+# per-endpoint p50/p95/p99 latency and throughput.
+#
+#   python -m benchmarks.load --users 50 --requests 2000 --out benchmarks/results/load.json
+#   python -m benchmarks.compare old.json new.json
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import summarize, write_results
+from benchmarks.fakes import install_fakes
+
+# endpoint -> relative weight in the request mix
+DEFAULT_MIX = {"create_order": 5, "assign_agent": 2, "customer_orders": 3}
+
+
+class LoadRun:
+    def __init__(self, client, customers, addresses, mix, seed):
+        self.client = client
+        self.customers = customers
+        self.addresses = addresses
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.rng = random.Random(seed)
+        self.order_ids = []
+        self.samples = {name: [] for name in self.endpoints}
+        self.errors = {name: 0 for name in self.endpoints}
+
+    async def create_order(self):
+        response = await self.client.post("/orders/create", json={
+            "customer_name": self.rng.choice(self.customers),
+            "issue": "restring",
+            "address": self.rng.choice(self.addresses),
+        })
+        if response.status_code == 200:
+            self.order_ids.append(response.json()["order_id"])
+        return response
+
+    async def assign_agent(self):
+        if not self.order_ids:
+            return await self.create_order()
+        return await self.client.post(f"/orchestrator/assign_agent/{self.rng.choice(self.order_ids)}")
+
+    async def customer_orders(self):
+        return await self.client.get(f"/orders/customer/{self.rng.choice(self.customers)}")
+
+    async def user(self, budget):
+        while budget["remaining"] > 0:
+            budget["remaining"] -= 1
+            name = self.rng.choices(self.endpoints, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(self, name)()
+                # A customer with no orders yet is a valid 404
+                ok = response.status_code < 400 or (name == "customer_orders" and response.status_code == 404)
+            except Exception:
+                ok = False
+            self.samples[name].append(time.perf_counter() - start)
+            if not ok:
+                self.errors[name] += 1
+
+
+async def seed_agents(repository, count, rng):
+    for i in range(count):
+        await repository.create_agent(
+            f"agent-{i}", f"Agent {i}", "active", 12.97 + rng.uniform(-0.1, 0.1), 77.59 + rng.uniform(-0.1, 0.1), 40
+        )
+
+
+async def run(users=20, requests=1000, agents=50, customers=200, addresses=300, warm_ratio=0.8,
+              mix=None, seed=7):
+    """
+    warm_ratio: share of addresses pre-resolved, i.e. served from the
+    geocode cache; the rest go through the background geocoding queue.
+    """
+    import httpx
+    from backend.main import app
+    from backend.services.repository import get_repository
+    from backend.services.geocode_client import geocode_address
+
+    rng = random.Random(seed)
+    address_list = [f"{i} Court Road, Bengaluru" for i in range(addresses)]
+    for address in address_list[:int(addresses * warm_ratio)]:
+        geocode_address(address)
+    customer_list = [f"player-{i}" for i in range(customers)]
+
+    async with app.router.lifespan_context(app):
+        await seed_agents(get_repository(), agents, rng)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            load = LoadRun(client, customer_list, address_list, mix or DEFAULT_MIX, seed)
+            budget = {"remaining": requests}
+            start = time.perf_counter()
+            await asyncio.gather(*(load.user(budget) for _ in range(users)))
+            elapsed = time.perf_counter() - start
+
+    results = {
+        name: summarize(samples, elapsed_s=elapsed, errors=load.errors[name])
+        for name, samples in load.samples.items()
+    }
+    everything = [s for samples in load.samples.values() for s in samples]
+    results["total"] = summarize(everything, elapsed_s=elapsed, errors=sum(load.errors.values()))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--requests", type=int, default=1000, help="total requests across all users")
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--addresses", type=int, default=300)
+    parser.add_argument("--warm-ratio", type=float, default=0.8)
+    parser.add_argument("--geocode-latency", type=float, default=0.05, help="seconds per fake geocode miss")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+
+    install_fakes(geocode_latency_s=args.geocode_latency)
+    config = {k: v for k, v in vars(args).items() if k != "out"}
+    results = asyncio.run(run(
+        users=args.users, requests=args.requests, agents=args.agents, customers=args.customers,
+        addresses=args.addresses, warm_ratio=args.warm_ratio, seed=args.seed,
+    ))
+    write_results(args.out, "load", results, config=config)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,79 @@
+# benchmarks/micro.py
+# Micro-benchmarks for the hot paths: distance matrix, single-route OR-Tools
+# solve, nearest-agent lookup and ETA prediction. Runs against local fakes.
+#
+#   python -m benchmarks.micro --out benchmarks/results/micro.json
+#   python -m benchmarks.micro --quick      # fewer runs, skips 500 stops
+
+import argparse
+import json
+import random
+
+from benchmarks.common import summarize, time_calls, write_results
+from benchmarks.fakes import install_fakes
+
+
+def random_points(n, rng, center=(12.97, 77.59), spread_deg=0.3):
+    return [
+        (center[0] + rng.uniform(-spread_deg, spread_deg) / 2, center[1] + rng.uniform(-spread_deg, spread_deg) / 2)
+        for _ in range(n)
+    ]
+
+
+def run(quick=False, seed=7):
+    rng = random.Random(seed)
+    scale = 0.2 if quick else 1.0
+    runs = lambda n: max(1, int(n * scale))
+    results = {}
+
+    from backend.services.distance_matrix import distance_matrix_km
+    for n in (100, 1000):
+        points = random_points(n, rng)
+        results[f"distance_matrix/{n}"] = summarize(time_calls(lambda: distance_matrix_km(points), runs(50)))
+
+    from backend.services.optimizer import optimizer
+    for n, count in ((10, 50), (100, 5), (500, 1)):
+        if quick and n == 500:
+            continue
+        points = random_points(n, rng)
+        results[f"compute_shortest_route/{n}"] = summarize(
+            time_calls(lambda: optimizer.compute_shortest_route(points), runs(count), warmup=0 if n == 500 else 1)
+        )
+
+    from backend.services.agent_index import AgentIndex
+    for n in (100, 10000):
+        index = AgentIndex()
+        index.load([{"agent_id": f"a{i}", "name": f"Agent {i}", "lat": lat, "lon": lon}
+                    for i, (lat, lon) in enumerate(random_points(n, rng))])
+        queries = random_points(1000, rng)
+        query_iter = iter(queries * 10)
+        results[f"nearest_agent/{n}"] = summarize(
+            time_calls(lambda: index.nearest(*next(query_iter), k=1), runs(1000))
+        )
+
+    import numpy as np
+    from backend.services.ml_predictor import get_ml_predictor
+    predictor = get_ml_predictor()
+    features = {"distance_km": 4.2, "traffic_level": 1.0, "agent_score": 1.0}
+    results["predict_eta/heuristic"] = summarize(time_calls(lambda: predictor.predict_eta(features), runs(1000)))
+
+    sample = np.random.default_rng(seed)
+    X = np.column_stack([sample.uniform(0, 20, 500), sample.uniform(0.5, 2, 500), sample.uniform(0.5, 1.5, 500)])
+    predictor.update_model(X, X[:, 0] * 2.5 + X[:, 1] * 4)
+    results["predict_eta/model"] = summarize(time_calls(lambda: predictor.predict_eta(features), runs(1000)))
+    table = {name: X[:100, i] for i, name in enumerate(("distance_km", "traffic_level", "agent_score"))}
+    results["predict_batch/100"] = summarize(time_calls(lambda: predictor.predict_batch(table), runs(500)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="benchmarks/results/micro.json")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    install_fakes()
+    results = run(quick=args.quick, seed=args.seed)
+    write_results(args.out, "micro", results, config={"quick": args.quick, "seed": args.seed})
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,50 @@
+# benchmarks/startup.py
+# Cold-start benchmark: imports a module in fresh interpreters and reports
+# wall time plus which heavy third-party libraries the import pulled in.
+#
+#   python -m benchmarks.startup                # backend.main
+#   python -m benchmarks.startup --module frontend.components.registration
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["neo4j", "twilio", "sklearn", "joblib", "ortools", "geopy", "scipy"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs=5):
+    samples, loaded = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(out)
+        samples.append(result["seconds"])
+        loaded = result["loaded"]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.module, args.runs), indent=2))
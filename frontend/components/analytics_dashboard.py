@@ -1,61 +1,65 @@
+import requests
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from backend.services.neo4j_client import neo4j_client
+from components.data_access import API_BASE, fetch_analytics, order_snapshot, invalidate
+
+STATUSES = ["pending", "in_progress", "completed"]
 
 def show_analytics():
     st.title("📊 Analytics Dashboard")
     st.write("Track performance, orders, and agent metrics in real-time.")
 
+    # Pre-aggregated counters from the API and the shared order snapshot
     try:
-        with neo4j_client.driver.session() as session:
-            # Deliveries per agent
-            result = session.run(
-                "MATCH (a:Agent)-[:ASSIGNED_TO]->(o:Order) "
-                "RETURN a.name AS agent, count(o) AS deliveries"
-            )
-            data = pd.DataFrame(result.data())
-            if not data.empty:
-                fig = px.bar(data, x="agent", y="deliveries", title="Deliveries per Agent")
-                st.plotly_chart(fig)
-            else:
-                st.info("No delivery data available yet.")
-
-            # Orders table with coordinates
-            order_result = session.run(
-                """
-                MATCH (o:Order)-[:DELIVERED_TO]->(l:Location)
-                OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o)
-                RETURN o.order_id AS order_id, o.status AS status, o.issue AS issue,
-                       l.address AS address, l.lat AS lat, l.lon AS lon,
-                       a.name AS agent
-                ORDER BY o.timestamp DESC
-                LIMIT 50
-                """
+        stats = fetch_analytics()
+        orders = order_snapshot().head(50)
+    except Exception as e:
+        st.error(f"Error calling backend: {e}")
+        return
+
+    cols = st.columns(4)
+    cols[0].metric("Orders", stats["total_orders"])
+    cols[1].metric("Pending", stats["orders_by_status"].get("pending", 0))
+    cols[2].metric("Completed", stats["orders_by_status"].get("completed", 0))
+    p50 = stats["completion_minutes"]["p50"]
+    cols[3].metric("Median completion", f"{p50:.0f} min" if p50 is not None else "–")
+
+    # Deliveries per agent
+    data = pd.DataFrame(stats["deliveries_per_agent"])
+    if not data.empty:
+        fig = px.bar(data, x="agent", y="deliveries", title="Deliveries per Agent")
+        st.plotly_chart(fig)
+    else:
+        st.info("No delivery data available yet.")
+
+    if stats["orders_by_hour"]:
+        hourly = pd.DataFrame(list(stats["orders_by_hour"].items()), columns=["hour", "orders"])
+        st.plotly_chart(px.line(hourly, x="hour", y="orders", title="Orders per Hour"))
+
+    # Orders table with coordinates
+    if not orders.empty:
+        st.subheader("🟢 Update Delivery Status")
+        for idx, row in orders.iterrows():
+            new_status = st.selectbox(
+                f"Order ID: {row['order_id']} | Status: {row['status']} | Issue: {row['issue']} | Address: {row['address']}",
+                STATUSES,
+                index=STATUSES.index(row['status']) if row['status'] in STATUSES else 0
             )
-            orders = pd.DataFrame(order_result.data())
-            if not orders.empty:
-                st.subheader("🟢 Update Delivery Status")
-                for idx, row in orders.iterrows():
-                    new_status = st.selectbox(
-                        f"Order ID: {row['order_id']} | Status: {row['status']} | Issue: {row['issue']} | Address: {row['address']}",
-                        ["pending", "in_progress", "completed"],
-                        index=["pending","in_progress","completed"].index(row['status'])
-                    )
-                    if st.button(f"Update {row['order_id']}"):
-                        session.run(
-                            "MATCH (o:Order {order_id:$order_id}) SET o.status=$status",
-                            order_id=row['order_id'], status=new_status
-                        )
-                        st.success(f"Order {row['order_id']} status updated to {new_status}")
-
-                # Map visualization
-                map_df = orders.dropna(subset=['lat','lon'])
-                if not map_df.empty:
-                    st.subheader("🗺️ Delivery Map")
-                    st.map(map_df[['lat','lon']])
-            else:
-                st.info("No delivery data available yet.")
+            if st.button(f"Update {row['order_id']}"):
+                try:
+                    requests.post(
+                        f"{API_BASE}/orders/{row['order_id']}/status", json={"status": new_status}, timeout=5
+                    ).raise_for_status()
+                    invalidate()
+                    st.success(f"Order {row['order_id']} status updated to {new_status}")
+                except Exception as e:
+                    st.error(f"Error updating order: {e}")
 
-    except Exception as e:
-        st.error(f"Error connecting to Neo4j: {e}")
+        # Map visualization
+        map_df = orders.dropna(subset=['lat','lon'])
+        if not map_df.empty:
+            st.subheader("🗺️ Delivery Map")
+            st.map(map_df[['lat','lon']])
+    else:
+        st.info("No delivery data available yet.")
@@ -0,0 +1,145 @@
+# frontend/components/data_access.py
+# Every read the Streamlit pages make goes through here. Results are cached
+# across reruns and sessions with explicit TTLs, and invalidate() drops them
+# after a write so the next rerun sees it. Pages share one order snapshot.
+
+import os
+import requests
+import pandas as pd
+import streamlit as st
+from backend.services.neo4j_client import get_neo4j_client
+from backend.utils.polyline import decode_polyline
+
+API_BASE = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
+SNAPSHOT_TTL_S = int(os.getenv("FRONTEND_SNAPSHOT_TTL_S", "30"))
+TABLE_TTL_S = int(os.getenv("FRONTEND_TABLE_TTL_S", "60"))
+ANALYTICS_TTL_S = int(os.getenv("FRONTEND_ANALYTICS_TTL_S", "10"))
+ROUTES_TTL_S = int(os.getenv("FRONTEND_ROUTES_TTL_S", "15"))
+SNAPSHOT_LIMIT = int(os.getenv("FRONTEND_SNAPSHOT_LIMIT", "1000"))  # most recent orders shown on maps
+PAGE_SIZE = 50
+
+ORDER_SNAPSHOT = """
+MATCH (o:Order)
+WITH o ORDER BY coalesce(o.timestamp, '') DESC LIMIT $limit
+OPTIONAL MATCH (o)-[:DELIVERED_TO]->(l:Location)
+OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o)
+OPTIONAL MATCH (c:Customer)-[:PLACED]->(o)
+RETURN o.order_id AS order_id, o.status AS status, o.issue AS issue,
+       coalesce(l.address, o.address) AS address, coalesce(l.lat, o.lat) AS lat,
+       coalesce(l.lon, o.lon) AS lon, a.agent_id AS agent_id, a.name AS agent,
+       c.name AS customer, o.timestamp AS timestamp
+"""
+
+# entity -> (query for one page, count query); pages are ordered on a stable key
+TABLES = {
+    "agents": (
+        "MATCH (a:Agent) RETURN a.agent_id AS ID, a.name AS Name, a.status AS Status, a.lat AS Lat, a.lon AS Lon "
+        "ORDER BY ID SKIP $skip LIMIT $limit",
+        "MATCH (a:Agent) RETURN count(a) AS n",
+    ),
+    "customers": (
+        "MATCH (c:Customer) RETURN c.customer_id AS ID, c.name AS Name, c.address AS Address, c.city AS City, "
+        "c.lat AS Lat, c.lon AS Lon, c.created_at AS Timestamp ORDER BY Name SKIP $skip LIMIT $limit",
+        "MATCH (c:Customer) RETURN count(c) AS n",
+    ),
+    "orders": (
+        "MATCH (o:Order) OPTIONAL MATCH (c:Customer)-[:PLACED]->(o) "
+        "RETURN o.order_id AS ID, coalesce(c.name, o.customer_name) AS Customer, o.address AS Address, "
+        "o.lat AS Lat, o.lon AS Lon, o.status AS Status ORDER BY coalesce(o.timestamp, '') DESC SKIP $skip LIMIT $limit",
+        "MATCH (o:Order) RETURN count(o) AS n",
+    ),
+    "locations": (
+        "MATCH (l:Location) RETURN l.name AS Name, l.lat AS Lat, l.lon AS Lon ORDER BY Name SKIP $skip LIMIT $limit",
+        "MATCH (l:Location) RETURN count(l) AS n",
+    ),
+}
+
+
+@st.cache_resource
+def get_client():
+    """One Neo4j driver for every session and rerun of the app."""
+    return get_neo4j_client()
+
+
+def _read(query, **params):
+    with get_client().driver.session() as session:
+        return session.run(query, **params).data()
+
+
+@st.cache_data(ttl=SNAPSHOT_TTL_S)
+def order_snapshot():
+    """Most recent orders with location, agent and customer; shared by every page."""
+    df = pd.DataFrame(
+        _read(ORDER_SNAPSHOT, limit=SNAPSHOT_LIMIT),
+        columns=["order_id", "status", "issue", "address", "lat", "lon", "agent_id", "agent", "customer", "timestamp"],
+    )
+    # API orders have integer ids, registration-page ones strings; one type for Arrow
+    df["order_id"] = df["order_id"].astype(str)
+    return df
+
+
+@st.cache_data(ttl=TABLE_TTL_S)
+def load_page(entity, page, page_size=PAGE_SIZE):
+    query, _ = TABLES[entity]
+    df = pd.DataFrame(_read(query, skip=page * page_size, limit=page_size))
+    if "ID" in df:
+        df["ID"] = df["ID"].astype(str)
+    return df
+
+
+@st.cache_data(ttl=TABLE_TTL_S)
+def count_rows(entity):
+    _, query = TABLES[entity]
+    return _read(query)[0]["n"]
+
+
+@st.cache_data(ttl=ANALYTICS_TTL_S)
+def fetch_analytics():
+    return requests.get(f"{API_BASE}/analytics", timeout=5).json()
+
+
+@st.cache_data(ttl=ROUTES_TTL_S)
+def route_layers():
+    """
+    Precomputed routes from GET /routes as map-ready data: (paths with one
+    row per agent, {agent: color}, view state kwargs). Colors and the view
+    are computed here once per fetch, not on every rerun.
+    """
+    routes = requests.get(f"{API_BASE}/routes", timeout=10).json()
+    colors = {
+        route["name"] or route["agent_id"]: [int(i*50)%256, int(i*80)%256, int(i*110)%256]
+        for i, route in enumerate(routes)
+    }
+    paths = pd.DataFrame(
+        [
+            {
+                "agent": route["name"] or route["agent_id"],
+                "path": [[lon, lat] for lat, lon in decode_polyline(route["polyline"])],
+                "stops": len(route["stops"]),
+                "distance_km": route["distance_km"],
+                "eta_minutes": route["eta_minutes"],
+            }
+            for route in routes if route["stops"]
+        ],
+        columns=["agent", "path", "stops", "distance_km", "eta_minutes"],
+    )
+    paths["color"] = paths["agent"].map(colors)
+    points = [point for path in paths["path"] for point in path]
+    view = None
+    if points:
+        view = {
+            "latitude": sum(p[1] for p in points) / len(points),
+            "longitude": sum(p[0] for p in points) / len(points),
+            "zoom": 12,
+            "pitch": 0,
+        }
+    return paths, colors, view
+
+
+def invalidate():
+    """Call after any write so the next rerun reloads instead of serving stale data."""
+    order_snapshot.clear()
+    load_page.clear()
+    count_rows.clear()
+    fetch_analytics.clear()
+    route_layers.clear()
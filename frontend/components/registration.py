@@ -1,40 +1,7 @@
 import streamlit as st
-from backend.services.neo4j_client import neo4j_client
+from backend.services.geocode_client import geocode_address
+from components.data_access import get_client, load_page, count_rows, invalidate, PAGE_SIZE
 from datetime import datetime
-import requests
-
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
-HEADERS = {"User-Agent": "badminton_agent_app"}
-
-
-# ----------------- HELPER FUNCTIONS -----------------
-def get_coordinates(address):
-    """Get lat/lon from address using free OSM Nominatim API."""
-    try:
-        params = {"q": address, "format": "json", "limit": 1}
-        resp = requests.get(NOMINATIM_URL, params=params, headers=HEADERS)
-        resp.raise_for_status()
-        data = resp.json()
-        if data:
-            lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
-            return lat, lon
-        return None, None
-    except:
-        return None, None
-
-
-def get_city(lat, lon):
-    """Get city from coordinates using free OSM Nominatim API."""
-    try:
-        params = {"lat": lat, "lon": lon, "format": "json"}
-        resp = requests.get(REVERSE_URL, params=params, headers=HEADERS)
-        resp.raise_for_status()
-        data = resp.json()
-        address = data.get("address", {})
-        return address.get("city") or address.get("town") or address.get("village") or "Unknown"
-    except:
-        return "Unknown"
 
 
 # ----------------- REGISTRATION FUNCTIONS -----------------
@@ -46,10 +13,10 @@ def register_agent():
     address = st.text_input("Address (optional)")
 
     if st.button("Add Agent"):
-        lat, lon = get_coordinates(address) if address else (None, None)
-        city = get_city(lat, lon) if lat and lon else None
+        lat, lon, city = geocode_address(address) if address else (None, None, None)
         timestamp = datetime.now().isoformat()
-        neo4j_client.create_agent(agent_id, name, status, lat, lon)
+        get_client().create_agent(agent_id, name, status, lat, lon)
+        invalidate()
         st.success(f"Agent {name} added! City: {city or 'Unknown'}, Timestamp: {timestamp}")
 
 
@@ -59,16 +26,16 @@ def register_customer():
     name = st.text_input("Customer Name")
     address = st.text_input("Address")
     if st.button("Add Customer"):
-        lat, lon = get_coordinates(address)
-        city = get_city(lat, lon) if lat and lon else None
+        lat, lon, city = geocode_address(address)
         timestamp = datetime.now().isoformat()
         # Create a Customer node
-        with neo4j_client.driver.session() as session:
+        with get_client().driver.session() as session:
             session.run(
                 "MERGE (c:Customer {customer_id:$id}) "
                 "SET c.name=$name, c.address=$address, c.lat=$lat, c.lon=$lon, c.city=$city, c.created_at=$ts",
                 id=customer_id, name=name, address=address, lat=lat, lon=lon, city=city, ts=timestamp
             )
+        invalidate()
         st.success(f"Customer {name} added! City: {city or 'Unknown'}, Timestamp: {timestamp}")
 
 
@@ -79,12 +46,12 @@ def register_order():
     agent_id = st.text_input("Agent ID (optional)")
     address = st.text_input("Delivery Address")
     if st.button("Add Order"):
-        lat, lon = get_coordinates(address)
-        city = get_city(lat, lon) if lat and lon else None
+        lat, lon, city = geocode_address(address)
         timestamp = datetime.now().isoformat()
-        neo4j_client.create_order(order_id, "Customer-"+customer_id, address, lat, lon)
+        get_client().create_order(order_id, "Customer-"+customer_id, address, lat, lon)
         if agent_id:
-            neo4j_client.assign_agent_to_order(order_id, agent_id)
+            get_client().assign_agent_to_order(order_id, agent_id)
+        invalidate()
         st.success(f"Order {order_id} added! City: {city or 'Unknown'}, Timestamp: {timestamp}")
 
 
@@ -93,28 +60,25 @@ def register_location():
     name = st.text_input("Location Name")
     address = st.text_input("Address")
     if st.button("Add Location"):
-        lat, lon = get_coordinates(address)
-        city = get_city(lat, lon) if lat and lon else None
+        lat, lon, city = geocode_address(address)
         timestamp = datetime.now().isoformat()
-        neo4j_client.create_location(name, lat, lon)
+        get_client().create_location(name, lat, lon)
+        invalidate()
         st.success(f"Location {name} added! City: {city or 'Unknown'}, Timestamp: {timestamp}")
 
 
 # ----------------- DISPLAY TABLES -----------------
-def show_tables():
-    with neo4j_client.driver.session() as session:
-        st.subheader("Agents")
-        agents = session.run("MATCH (a:Agent) RETURN a.agent_id AS ID, a.name AS Name, a.status AS Status, a.lat AS Lat, a.lon AS Lon").data()
-        st.dataframe(agents)
+def show_paginated(entity, title):
+    st.subheader(title)
+    total = count_rows(entity)
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input(f"{title} page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{entity}_page")
+    st.dataframe(load_page(entity, page - 1))
+    st.caption(f"{total} {entity}")
 
-        st.subheader("Customers")
-        customers = session.run("MATCH (c:Customer) RETURN c.customer_id AS ID, c.name AS Name, c.address AS Address, c.city AS City, c.lat AS Lat, c.lon AS Lon, c.created_at AS Timestamp").data()
-        st.dataframe(customers)
 
-        st.subheader("Orders")
-        orders = session.run("MATCH (o:Order) RETURN o.order_id AS ID, o.customer_name AS Customer, o.address AS Address, o.lat AS Lat, o.lon AS Lon, o.status AS Status").data()
-        st.dataframe(orders)
-
-        st.subheader("Locations")
-        locations = session.run("MATCH (l:Location) RETURN l.name AS Name, l.lat AS Lat, l.lon AS Lon").data()
-        st.dataframe(locations)
+def show_tables():
+    show_paginated("agents", "Agents")
+    show_paginated("customers", "Customers")
+    show_paginated("orders", "Orders")
+    show_paginated("locations", "Locations")
@@ -1,40 +1,36 @@
 import streamlit as st
 import pandas as pd
-from backend.services.neo4j_client import neo4j_client
 import pydeck as pdk
+from components.data_access import order_snapshot, route_layers
 
 def visualize_routes():
     st.title("🚀 Routes Visualizer")
     st.write("Visualize agent delivery routes, optimized for efficiency.")
 
     try:
-        with neo4j_client.driver.session() as session:
-            # Fetch orders with location and agent info
-            query = """
-            MATCH (o:Order)-[:DELIVERED_TO]->(l:Location)
-            OPTIONAL MATCH (a:Agent)-[:ASSIGNED_TO]->(o)
-            OPTIONAL MATCH (c:Customer)-[:PLACED]->(o)
-            RETURN o.order_id AS order_id, o.status AS status,
-                   o.issue AS issue, l.address AS address, l.lat AS lat, l.lon AS lon,
-                   a.name AS agent, c.name AS customer
-            """
-            result = session.run(query)
-            df = pd.DataFrame(result.data())
+        # Orders with location and agent info, shared with the other pages;
+        # route geometry is solved and encoded by the API
+        df = order_snapshot()
+        paths, color_map, view = route_layers()
 
-        if df.empty:
+        if df.empty and paths.empty:
             st.info("No delivery data available yet.")
             return
 
         # Drop rows without coordinates
-        df_map = df.dropna(subset=["lat", "lon"])
-
-        # Assign different colors to agents
-        agents = df_map['agent'].dropna().unique()
-        color_map = {agent: [int(i*50)%256, int(i*80)%256, int(i*110)%256] for i, agent in enumerate(agents)}
+        df_map = df.dropna(subset=["lat", "lon"]).copy()
         df_map['color'] = df_map['agent'].apply(lambda x: color_map.get(x, [100,100,100]))
 
         # Pydeck map
         st.subheader("📍 Delivery Routes Map")
+        path_layer = pdk.Layer(
+            "PathLayer",
+            data=paths,
+            get_path="path",
+            get_color="color",
+            width_min_pixels=3,
+            pickable=True
+        )
         layer = pdk.Layer(
             "ScatterplotLayer",
             data=df_map,
@@ -54,7 +50,7 @@ def visualize_routes():
             "style": {"backgroundColor": "white", "color": "black"}
         }
 
-        view_state = pdk.ViewState(
+        view_state = pdk.ViewState(**view) if view else pdk.ViewState(
             latitude=df_map['lat'].mean(),
             longitude=df_map['lon'].mean(),
             zoom=12,
@@ -62,13 +58,17 @@ def visualize_routes():
         )
 
         r = pdk.Deck(
-            layers=[layer],
+            layers=[path_layer, layer],
             initial_view_state=view_state,
             tooltip=tooltip
         )
 
         st.pydeck_chart(r)
 
+        if not paths.empty:
+            st.subheader("🧭 Routes")
+            st.dataframe(paths[['agent','stops','distance_km','eta_minutes']])
+
         # Optional: Show order table below map
         st.subheader("📋 Orders Table")
         st.dataframe(df[['order_id','status','agent','customer','issue','address']])
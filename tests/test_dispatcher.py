@@ -0,0 +1,51 @@
+# tests/test_dispatcher.py
+from backend.services.dispatcher import match_orders_to_agents
+
+
+def order(order_id, lat, lon, rackets):
+    return {"order_id": order_id, "lat": lat, "lon": lon, "rackets": rackets}
+
+
+def agent(agent_id, lat, lon, capacity, load=0):
+    return {"agent_id": agent_id, "lat": lat, "lon": lon, "capacity": capacity, "load": load}
+
+
+def rackets_per_agent(assignments, orders):
+    rackets = {o["order_id"]: o["rackets"] for o in orders}
+    totals = {}
+    for a in assignments:
+        totals[a["agent_id"]] = totals.get(a["agent_id"], 0) + rackets[a["order_id"]]
+    return totals
+
+
+def test_racket_counts_bind_capacity():
+    # Three 5-racket orders: the nearby 4-racket agent can take none of
+    # them, the far 10-racket agent only two
+    orders = [order(i, 12.97, 77.59, 5) for i in range(3)]
+    agents = [agent("near", 12.97, 77.59, 4), agent("far", 13.07, 77.69, 10)]
+    assignments, unassigned = match_orders_to_agents(orders, agents)
+    assert rackets_per_agent(assignments, orders) == {"far": 10}
+    assert len(unassigned) == 1
+
+
+def test_existing_load_reduces_free_capacity():
+    orders = [order(1, 12.97, 77.59, 3), order(2, 12.97, 77.59, 2)]
+    agents = [agent("a", 12.97, 77.59, 6, load=3), agent("b", 12.99, 77.61, 3)]
+    assignments, unassigned = match_orders_to_agents(orders, agents)
+    assert unassigned == []
+    totals = rackets_per_agent(assignments, orders)
+    assert totals["a"] <= 3 and totals["b"] <= 3
+
+
+def test_prefers_nearest_when_capacity_allows():
+    orders = [order(1, 12.97, 77.59, 1)]
+    agents = [agent("far", 13.2, 77.9, 20), agent("near", 12.971, 77.591, 20)]
+    assignments, _ = match_orders_to_agents(orders, agents)
+    assert assignments[0]["agent_id"] == "near"
+
+
+def test_max_km_leaves_distant_orders_unassigned():
+    orders = [order(1, 12.97, 77.59, 1)]
+    agents = [agent("far", 13.97, 78.59, 20)]
+    assignments, unassigned = match_orders_to_agents(orders, agents, max_km=5)
+    assert assignments == [] and unassigned == [1]